@@ -0,0 +1,231 @@
+"""
+Static analysis over a parsed Scenario's transition graph.
+
+Every pass is iterative and linear in states + transitions, so it scales to
+generated scenarios with tens of thousands of states.
+"""
+
+from __future__ import annotations
+
+import sys
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Set
+
+from .model import Scenario, State
+
+
+def successors(state: State) -> List[str]:
+    """Distinct goto targets of a state, intents first then default."""
+    seen: Dict[str, None] = {}
+    for trans in state.intents.values():
+        if trans.next_state is not None:
+            seen.setdefault(trans.next_state)
+    if state.default.next_state is not None:
+        seen.setdefault(state.default.next_state)
+    return list(seen)
+
+
+def _can_end(state: State) -> bool:
+    if state.default.next_state is None:
+        return True
+    return any(trans.next_state is None for trans in state.intents.values())
+
+
+def reachable_states(scenario: Scenario) -> Set[str]:
+    """States reachable from ``initial_state`` (BFS)."""
+    seen = {scenario.initial_state}
+    queue = deque(seen)
+    while queue:
+        for target in successors(scenario.states[queue.popleft()]):
+            if target not in seen:
+                seen.add(target)
+                queue.append(target)
+    return seen
+
+
+def states_reaching_end(scenario: Scenario) -> Set[str]:
+    """States from which some path leads to ``end`` (reverse BFS)."""
+    reverse: Dict[str, List[str]] = {name: [] for name in scenario.states}
+    for name, state in scenario.states.items():
+        for target in successors(state):
+            reverse[target].append(name)
+    seen = {name for name, state in scenario.states.items() if _can_end(state)}
+    queue = deque(seen)
+    while queue:
+        for source in reverse[queue.popleft()]:
+            if source not in seen:
+                seen.add(source)
+                queue.append(source)
+    return seen
+
+
+def default_only_self_loops(scenario: Scenario) -> List[str]:
+    """States with no intents whose default loops back to themselves (traps)."""
+    return [
+        name
+        for name, state in scenario.states.items()
+        if not state.intents and state.default.next_state == name
+    ]
+
+
+def strongly_connected_components(scenario: Scenario) -> List[List[str]]:
+    """Tarjan's algorithm, iterative; components come out in reverse topological order."""
+    index: Dict[str, int] = {}
+    lowlink: Dict[str, int] = {}
+    on_stack: Set[str] = set()
+    stack: List[str] = []
+    components: List[List[str]] = []
+    counter = 0
+
+    for root in scenario.states:
+        if root in index:
+            continue
+        work = [(root, iter(successors(scenario.states[root])))]
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = lowlink[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors(scenario.states[child]))))
+                    break
+                if child in on_stack:
+                    lowlink[node] = min(lowlink[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component: List[str] = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    return components
+
+
+@dataclass
+class AnalysisReport:
+    """Result of analyze(); state lists keep the scenario's declaration order."""
+
+    reachable: List[str]
+    unreachable: List[str]
+    no_end_path: List[str]
+    default_only_self_loops: List[str]
+    cycles: List[List[str]] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not (self.unreachable or self.no_end_path or self.default_only_self_loops)
+
+    def warnings(self) -> List[str]:
+        messages = []
+        if self.unreachable:
+            messages.append(f"Unreachable states: {', '.join(self.unreachable)}")
+        if self.no_end_path:
+            messages.append(f"States with no path to end: {', '.join(self.no_end_path)}")
+        if self.default_only_self_loops:
+            messages.append(f"Default-only self-loops: {', '.join(self.default_only_self_loops)}")
+        return messages
+
+
+def analyze(scenario: Scenario) -> AnalysisReport:
+    reachable = reachable_states(scenario)
+    ending = states_reaching_end(scenario)
+    cycles = [
+        component
+        for component in strongly_connected_components(scenario)
+        if len(component) > 1 or component[0] in successors(scenario.states[component[0]])
+    ]
+    return AnalysisReport(
+        reachable=[name for name in scenario.states if name in reachable],
+        unreachable=[name for name in scenario.states if name not in reachable],
+        no_end_path=[name for name in scenario.states if name in reachable and name not in ending],
+        default_only_self_loops=[name for name in default_only_self_loops(scenario) if name in reachable],
+        cycles=cycles,
+    )
+
+
+def prune_unreachable(scenario: Scenario) -> Scenario:
+    """Return a new Scenario without states unreachable from the initial state."""
+    reachable = reachable_states(scenario)
+    states = {name: state for name, state in scenario.states.items() if name in reachable}
+    return Scenario(name=scenario.name, states=states, initial_state=scenario.initial_state)
+
+
+@dataclass
+class MemoryReport:
+    """Approximate footprint of a Scenario; objects shared within it are counted once."""
+
+    states: int
+    transitions: int  # rule references across all states
+    unique_transitions: int
+    unique_responses: int
+    model_bytes: int  # Scenario/State/Transition instances
+    container_bytes: int  # dicts
+    string_bytes: int  # names, intent labels and replies
+
+    @property
+    def total_bytes(self) -> int:
+        return self.model_bytes + self.container_bytes + self.string_bytes
+
+    @property
+    def shared_transitions(self) -> int:
+        return self.transitions - self.unique_transitions
+
+    def summary(self) -> str:
+        return (
+            f"memory={self.total_bytes / 1024:.1f}KiB (model={self.model_bytes} dicts={self.container_bytes} "
+            f"strings={self.string_bytes} bytes) transitions={self.transitions} unique={self.unique_transitions} "
+            f"responses={self.unique_responses}"
+        )
+
+
+def memory_footprint(scenario: Scenario) -> MemoryReport:
+    """Shallow ``sys.getsizeof`` sums by identity, so deduplicated transitions and interned names count once."""
+    seen: Set[int] = set()
+
+    def size(obj: object) -> int:
+        if obj is None or id(obj) in seen:
+            return 0
+        seen.add(id(obj))
+        return sys.getsizeof(obj)
+
+    model = size(scenario)
+    containers = size(scenario.states)
+    strings = size(scenario.name) + size(scenario.initial_state)
+    transitions = 0
+    unique_transitions: Set[int] = set()
+    responses: Set[int] = set()
+    for name, state in scenario.states.items():
+        model += size(state)
+        containers += size(state.intents)
+        strings += size(name) + size(state.name)
+        rules = list(state.intents.items()) + [("default", state.default)]
+        for intent, trans in rules:
+            strings += size(intent)
+            transitions += 1
+            unique_transitions.add(id(trans))
+            responses.add(id(trans.response))
+            model += size(trans)
+            strings += size(trans.response) + size(trans.next_state)
+    return MemoryReport(
+        states=len(scenario.states),
+        transitions=transitions,
+        unique_transitions=len(unique_transitions),
+        unique_responses=len(responses),
+        model_bytes=model,
+        container_bytes=containers,
+        string_bytes=strings,
+    )
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any, BinaryIO, Callable, Dict, Optional, Set, Tuple
+
+from .intent_service import IntentService
+from .interpreter import Interpreter
+from .model import Scenario
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION = "default"
+
+
+def parse_record(line: str) -> Tuple[str, Optional[str]]:
+    """
+    Parse one input line into (session, text).
+
+    JSON objects use their ``session``/``text`` fields; a missing or null
+    session means the default session and a missing or null text is empty.
+    ``{"session": ..., "close": true}`` closes that session and is returned
+    with text None. Any other line is plain text for the default session.
+    Raises ValueError on bad JSON or non-string fields.
+    """
+    stripped = line.strip()
+    if stripped.startswith("{"):
+        data = json.loads(stripped)
+        if not isinstance(data, dict):
+            raise ValueError("record must be a JSON object")
+        session = data.get("session")
+        text = data.get("text")
+        if session is not None and not isinstance(session, str):
+            raise ValueError("session must be a string")
+        if text is not None and not isinstance(text, str):
+            raise ValueError("text must be a string")
+        close = data.get("close", False)
+        if not isinstance(close, bool):
+            raise ValueError("close must be true or false")
+        if close:
+            return session or DEFAULT_SESSION, None
+        return session or DEFAULT_SESSION, text or ""
+    return DEFAULT_SESSION, line
+
+
+class BatchRunner:
+    """
+    Non-interactive driver: many sessions from one line stream, replies as JSONL.
+
+    Turns of one session run in input order; different sessions run
+    concurrently, with at most ``concurrency`` classifications in flight.
+    Once a conversation ends or is closed by a close record, the next record
+    with the same session id starts a new conversation. A session is dropped as soon as it has ended
+    with nothing queued, so memory follows the live sessions only. Output is flushed whenever the input is idle, so the
+    process also works as a request/response pipe.
+    """
+
+    def __init__(
+        self,
+        scenario: Scenario,
+        intent_service: IntentService,
+        out: BinaryIO,
+        concurrency: int = 32,
+        on_session: Optional[Callable[[Interpreter], None]] = None,
+        context_turns: int = 0,
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+        self.scenario = scenario
+        self.intent_service = intent_service
+        self.out = out
+        self.concurrency = concurrency
+        self.on_session = on_session
+        self.context_turns = context_turns
+        self.sessions: Dict[str, Interpreter] = {}  # live sessions only
+        self.stats = {"records": 0, "replies": 0, "errors": 0, "closed": 0}
+        self._seq = 0
+        self._started = 0
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._lines: Optional[asyncio.Queue] = None
+
+    async def run(self, lines: "asyncio.Queue[Optional[str]]") -> Dict[str, int]:
+        """Consume lines until None (EOF); returns counters."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        queues = self._queues
+        self._lines = lines
+        workers: Set[asyncio.Task] = set()  # live session workers only
+        while True:
+            line = await lines.get()
+            if line is None:
+                break
+            if not line.strip():
+                continue
+            seq = self._seq
+            self._seq += 1
+            self.stats["records"] += 1
+            try:
+                session, text = parse_record(line)
+            except ValueError as exc:
+                self._emit({"seq": seq, "error": f"invalid record: {exc}"})
+                continue
+            queue = queues.get(session)
+            if queue is None and text is None:
+                self._emit({"seq": seq, "session": session, "closed": True})  # nothing live to close
+                continue
+            if queue is None:
+                queue = queues[session] = asyncio.Queue()
+                worker = asyncio.create_task(self._session_worker(session, queue, semaphore))
+                workers.add(worker)
+                worker.add_done_callback(workers.discard)
+            queue.put_nowait((seq, text))
+        for queue in queues.values():
+            queue.put_nowait(None)
+        await asyncio.gather(*list(workers))
+        self.out.flush()
+        return dict(self.stats, sessions=self._started)
+
+    def _start_session(self, session: str) -> Interpreter:
+        bot = self.sessions[session] = Interpreter(
+            self.scenario, self.intent_service, context_turns=self.context_turns
+        )
+        self._started += 1
+        if self.on_session is not None:
+            self.on_session(bot)
+        return bot
+
+    async def _session_worker(self, session: str, queue: asyncio.Queue, semaphore: asyncio.Semaphore) -> None:
+        bot = self._start_session(session)
+        closed = False
+        while True:
+            if (closed or bot.ended) and queue.empty():
+                # no await between the check and the removal, so no record can slip in
+                del self._queues[session]
+                del self.sessions[session]
+                return
+            item = await queue.get()
+            if item is None:
+                return
+            seq, text = item
+            if text is None:
+                closed = True
+                self._emit({"seq": seq, "session": session, "closed": True})
+                continue
+            if closed or bot.ended:
+                # same rule as for a record arriving after the session was dropped
+                bot = self._start_session(session)
+                closed = False
+            record: Dict[str, Any] = {"seq": seq, "session": session, "text": text}
+            try:
+                async with semaphore:
+                    record["reply"] = await bot.process_input_async(text)
+                record["state"] = bot.current_state
+                record["ended"] = bot.ended
+            except Exception as exc:  # keep the batch going; report per record
+                logger.exception("Batch turn failed session=%s seq=%s", session, seq)
+                record["error"] = str(exc)
+            self._emit(record)
+
+    def _emit(self, record: Dict[str, Any]) -> None:
+        if "error" in record:
+            self.stats["errors"] += 1
+        elif record.get("closed"):
+            self.stats["closed"] += 1
+        else:
+            self.stats["replies"] += 1
+        self.out.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+        if self._lines is None or self._lines.empty():
+            self.out.flush()
@@ -1,59 +1,64 @@
 from __future__ import annotations
 
 import argparse
-import configparser
+import asyncio
 import logging
 import os
 import pathlib
-import select
 import sys
-from typing import Any, Dict, Optional
+import threading
+import time
+from typing import Any, Dict, Optional, Set
 
-from . import interpreter
+from . import analysis, interpreter
+from .batch import BatchRunner
 from . import parser as dsl_parser
-from .intent_service import IntentService, LLMIntentService, StubIntentService
-
-
-def _str_to_bool(value: Optional[str], default: bool) -> bool:
-    if value is None:
-        return default
-    return value.strip().lower() in {"1", "true", "yes", "y", "on"}
-
-
-def _load_config(path: Optional[str]) -> Dict[str, Any]:
-    if not path:
-        return {}
-    config = configparser.ConfigParser()
-    config.read(path)
-    data: Dict[str, Any] = {}
-    if "llm" in config:
-        data.update(config["llm"])
-    if "settings" in config:
-        data.update(config["settings"])
-    # intent_descriptions sections: [intent_descriptions.<scenario>]
-    descriptions: Dict[str, Dict[str, str]] = {}
-    prefix = "intent_descriptions."
-    for section in config.sections():
-        if section.startswith(prefix):
-            scenario_name = section[len(prefix) :]
-            descriptions[scenario_name] = dict(config[section])
-    if descriptions:
-        data["intent_descriptions"] = descriptions
-
-    # welcome message per scenario: [welcome.<scenario>]
-    welcomes: Dict[str, str] = {}
-    welcome_prefix = "welcome."
-    for section in config.sections():
-        if section.startswith(welcome_prefix):
-            scenario_name = section[len(welcome_prefix) :]
-            # take first key/value as the message; or empty section -> skip
-            if config[section]:
-                # pick the first item
-                first_key = next(iter(config[section]))
-                welcomes[scenario_name] = config[section][first_key]
-    if welcomes:
-        data["welcome_messages"] = welcomes
-    return data
+from .config import load_config, str_to_bool
+from .evaluation import default_factory, parse_classifier_spec
+from .intent_service import (
+    CascadeIntentService,
+    CascadeTier,
+    IntentService,
+    ShadowIntentService,
+    load_backend,
+    load_stub_mapping,
+)
+from .profiler import FlowProfiler
+from .sessions import SessionManager
+
+
+class StartupProfile:
+    """
+    Wall-clock breakdown of startup phases, printed to stderr by --profile-startup.
+
+    Phases recorded with ``startup=False`` (e.g. the batch run itself) are
+    shown but left out of the total.
+    """
+
+    def __init__(self, import_seconds: Optional[float] = None) -> None:
+        self.phases: Dict[str, float] = {}
+        self._excluded: Set[str] = set()
+        if import_seconds is not None:
+            self.phases["import"] = import_seconds
+        self._last = time.perf_counter()
+
+    def mark(self, phase: str, startup: bool = True) -> None:
+        """Record the time since the previous mark as ``phase``."""
+        now = time.perf_counter()
+        self.record(phase, now - self._last, startup)
+        self._last = now
+
+    def record(self, phase: str, seconds: float, startup: bool = True) -> None:
+        """Record ``phase`` once; later calls for the same phase are ignored."""
+        if phase not in self.phases:
+            self.phases[phase] = seconds
+            if not startup:
+                self._excluded.add(phase)
+
+    def report(self) -> str:
+        parts = [f"{phase}={seconds * 1000:.1f}" for phase, seconds in self.phases.items()]
+        total = sum(seconds for phase, seconds in self.phases.items() if phase not in self._excluded) * 1000
+        return f"startup profile (ms): {' '.join(parts)} total={total:.1f}"
 
 
 def _resolve_settings(args: argparse.Namespace, cfg: Dict[str, Any]) -> Dict[str, Any]:
@@ -68,6 +73,14 @@ def _resolve_settings(args: argparse.Namespace, cfg: Dict[str, Any]) -> Dict[str
         "welcome_messages": cfg.get("welcome_messages", {}),
         "log_file": cfg.get("log_file"),
         "idle_timeout": cfg.get("idle_timeout"),
+        "intent_keywords": cfg.get("intent_keywords", {}),
+        "cascade_threshold": cfg.get("cascade_threshold"),
+        "warm_up": cfg.get("warm_up"),
+        "context_turns": cfg.get("context_turns"),
+        "stub_mapping": cfg.get("stub_mapping"),
+        "llm_scoring": cfg.get("scoring"),
+        "shadow": cfg.get("shadow"),
+        "shadow_sample_rate": cfg.get("shadow_sample_rate"),
     }
 
     if args.api_base:
@@ -84,6 +97,18 @@ def _resolve_settings(args: argparse.Namespace, cfg: Dict[str, Any]) -> Dict[str
         settings["log_file"] = args.log_file
     if args.idle_timeout is not None:
         settings["idle_timeout"] = args.idle_timeout
+    if args.warm_up:
+        settings["warm_up"] = True
+    if args.context_turns is not None:
+        settings["context_turns"] = args.context_turns
+    if args.stub_mapping:
+        settings["stub_mapping"] = args.stub_mapping
+    if args.llm_scoring is not None:
+        settings["llm_scoring"] = args.llm_scoring
+    if args.shadow is not None:
+        settings["shadow"] = args.shadow
+    if args.shadow_sample_rate is not None:
+        settings["shadow_sample_rate"] = args.shadow_sample_rate
 
     # environment overrides everything
     settings["api_base"] = os.getenv("DSL_API_BASE", settings.get("api_base"))
@@ -91,10 +116,10 @@ def _resolve_settings(args: argparse.Namespace, cfg: Dict[str, Any]) -> Dict[str
     settings["model"] = os.getenv("DSL_MODEL", settings.get("model"))
     env_use_stub = os.getenv("DSL_USE_STUB")
     if env_use_stub is not None:
-        settings["use_stub"] = _str_to_bool(env_use_stub, False)
+        settings["use_stub"] = str_to_bool(env_use_stub, False)
     env_show_intent = os.getenv("DSL_SHOW_INTENT")
     if env_show_intent is not None:
-        settings["show_intent"] = _str_to_bool(env_show_intent, False)
+        settings["show_intent"] = str_to_bool(env_show_intent, False)
     env_idle = os.getenv("DSL_IDLE_TIMEOUT")
     if env_idle is not None:
         try:
@@ -102,8 +127,12 @@ def _resolve_settings(args: argparse.Namespace, cfg: Dict[str, Any]) -> Dict[str
         except ValueError:
             logging.warning("Invalid DSL_IDLE_TIMEOUT value: %s", env_idle)
 
-    settings["use_stub"] = _str_to_bool(str(settings.get("use_stub")) if settings.get("use_stub") is not None else None, False)
-    settings["show_intent"] = _str_to_bool(str(settings.get("show_intent")) if settings.get("show_intent") is not None else None, False)
+    if settings.get("use_stub") is None and settings.get("stub_mapping"):
+        # a mapping with no explicit stub/LLM choice means offline stub mode
+        settings["use_stub"] = True
+    settings["use_stub"] = str_to_bool(str(settings.get("use_stub")) if settings.get("use_stub") is not None else None, False)
+    settings["show_intent"] = str_to_bool(str(settings.get("show_intent")) if settings.get("show_intent") is not None else None, False)
+    settings["warm_up"] = str_to_bool(str(settings.get("warm_up")) if settings.get("warm_up") is not None else None, False)
     # idle timeout: None or float seconds; <=0 disables
     try:
         if settings.get("idle_timeout") is not None:
@@ -111,32 +140,288 @@ def _resolve_settings(args: argparse.Namespace, cfg: Dict[str, Any]) -> Dict[str
     except ValueError:
         logging.warning("Invalid idle_timeout config; disabling.")
         settings["idle_timeout"] = None
+    try:
+        settings["cascade_threshold"] = float(settings.get("cascade_threshold") or 0.6)
+    except ValueError:
+        logging.warning("Invalid cascade_threshold config; using 0.6.")
+        settings["cascade_threshold"] = 0.6
+    try:
+        settings["context_turns"] = max(0, int(settings.get("context_turns") or 0))
+    except ValueError:
+        logging.warning("Invalid context_turns config; disabling.")
+        settings["context_turns"] = 0
+    if settings.get("llm_scoring") not in (None, "generate", "logprobs"):
+        logging.warning("Invalid scoring config %r; using generate.", settings["llm_scoring"])
+        settings["llm_scoring"] = None
+    settings["llm_scoring"] = settings.get("llm_scoring") or "generate"
+    try:
+        rate = float(settings.get("shadow_sample_rate") if settings.get("shadow_sample_rate") is not None else 1.0)
+        settings["shadow_sample_rate"] = min(max(rate, 0.0), 1.0)
+    except ValueError:
+        logging.warning("Invalid shadow_sample_rate config; using 1.0.")
+        settings["shadow_sample_rate"] = 1.0
 
     return settings
 
 
+def _build_stub_service(settings: Dict[str, Any]) -> IntentService:
+    if settings.get("stub_mapping"):
+        logging.info("Using fuzzy stub intent service mapping=%s", settings["stub_mapping"])
+        return load_backend("fuzzy")(load_stub_mapping(settings["stub_mapping"]))
+    logging.info("Using stub intent service")
+    return load_backend("stub")()
+
+
 def _build_intent_service(settings: Dict[str, Any], scenario_name: str) -> IntentService:
     if settings["use_stub"]:
-        logging.info("Using stub intent service (use_stub=True)")
-        return StubIntentService()
+        return _build_stub_service(settings)
     api_base = settings.get("api_base") or ""
     api_key = settings.get("api_key") or ""
     model = settings.get("model") or ""
     if not (api_base and api_key and model):
         logging.warning("LLM settings incomplete; falling back to stub intent service")
-        return StubIntentService()
-    logging.info("Using LLM intent service model=%s api_base=%s", model, api_base)
+        return _build_stub_service(settings)
+    logging.info("Using LLM intent service model=%s api_base=%s scoring=%s", model, api_base, settings["llm_scoring"])
     desc_all = settings.get("intent_descriptions") or {}
     intent_descriptions = desc_all.get(scenario_name, {})
-    return LLMIntentService(
+    llm = load_backend("llm")(
         api_base=api_base,
         api_key=api_key,
         model=model,
         intent_descriptions=intent_descriptions,
+        scoring=settings["llm_scoring"],
+    )
+    if settings.get("warm_up"):
+        llm.warm_up()
+    # 级联：桩映射精确匹配 -> 关键词（足够确定时）-> LLM，缺省的层跳过
+    tiers = []
+    if settings.get("stub_mapping"):
+        tiers.append(CascadeTier("stub", load_backend("stub")(load_stub_mapping(settings["stub_mapping"]))))
+    keywords = (settings.get("intent_keywords") or {}).get(scenario_name)
+    if keywords:
+        tiers.append(
+            CascadeTier("keyword", load_backend("keyword")(keywords), threshold=settings["cascade_threshold"])
+        )
+    if not tiers:
+        return llm
+    tiers.append(CascadeTier("llm", llm))
+    logging.info(
+        "Using intent cascade %s (keyword threshold=%.2f)",
+        " -> ".join(tier.name for tier in tiers),
+        settings["cascade_threshold"],
+    )
+    return CascadeIntentService(tiers)
+
+
+def _build_shadow(settings: Dict[str, Any], primary: IntentService, scenario: Any) -> ShadowIntentService:
+    # the spec syntax is shared with the evaluation harness
+    candidate = default_factory(settings)(parse_classifier_spec(settings["shadow"]), scenario)
+    logging.info("Shadowing intent service with %s sample_rate=%.2f", settings["shadow"], settings["shadow_sample_rate"])
+    return ShadowIntentService(primary, candidate, sample_rate=settings["shadow_sample_rate"])
+
+
+def _log_intent_stats(intent_service: IntentService) -> None:
+    if isinstance(intent_service, ShadowIntentService):
+        intent_service.close(timeout=5.0)
+        logging.info("Shadow intent stats: %s", intent_service.stats())
+        intent_service = intent_service.primary
+    if isinstance(intent_service, CascadeIntentService):
+        logging.info("Intent cascade stats: %s", intent_service.stats())
+
+
+class _TimedOut:
+    """Queued by the session timer after an idle timeout has already run the default rule."""
+
+    def __init__(self, reply: str) -> None:
+        self.reply = reply
+
+
+_NOTHING = object()
+_REPL_SESSION = "repl"
+
+
+def _read_stdin_in_thread(loop: asyncio.AbstractEventLoop, stdin: Any, lines: "asyncio.Queue[Optional[str]]") -> None:
+    # daemon thread: a readline still blocked at exit must not hold up interpreter shutdown
+    def _run() -> None:
+        try:
+            for line in iter(stdin.readline, ""):
+                loop.call_soon_threadsafe(lines.put_nowait, line.rstrip("\r\n"))
+            loop.call_soon_threadsafe(lines.put_nowait, None)
+        except RuntimeError:  # loop already closed
+            pass
+
+    threading.Thread(target=_run, name="stdin-reader", daemon=True).start()
+
+
+async def _pump_stdin(lines: "asyncio.Queue[Optional[str]]", stdin: Any = None) -> None:
+    """Feed stdin lines into the queue, then None on EOF."""
+    stdin = stdin if stdin is not None else sys.stdin
+    loop = asyncio.get_running_loop()
+    if stdin.isatty():
+        # connect_read_pipe would set O_NONBLOCK on the terminal, which stdout
+        # shares, and print() could then fail with BlockingIOError
+        _read_stdin_in_thread(loop, stdin, lines)
+        return
+    reader = asyncio.StreamReader()
+    try:
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), stdin)
+    except (OSError, ValueError):
+        # regular files (``< file``) cannot be watched by the loop; read them in a thread
+        while True:
+            line = await asyncio.to_thread(stdin.readline)
+            if not line:
+                break
+            lines.put_nowait(line.rstrip("\r\n"))
+    else:
+        while True:
+            raw = await reader.readline()
+            if not raw:
+                break
+            lines.put_nowait(raw.decode("utf-8", errors="replace").rstrip("\r\n"))
+    lines.put_nowait(None)
+
+
+async def _run_repl(
+    bot: interpreter.Interpreter,
+    lines: "asyncio.Queue[Any]",
+    idle_timeout: Optional[float],
+    interactive: bool,
+    show_intent: bool,
+    profile: Optional[StartupProfile] = None,
+) -> None:
+    """
+    Drive one conversation from a queue of input lines (None = EOF).
+
+    Idle timeouts come from the session layer, which runs the default rule
+    itself and queues the reply. In interactive mode a new line cancels the
+    classification still in flight for the previous one; piped input is
+    processed in order without prompts.
+    """
+    tick = min(0.1, idle_timeout / 4) if idle_timeout is not None and idle_timeout > 0 else 0.1
+    sessions = SessionManager(idle_timeout, on_timeout=lambda _, reply: lines.put_nowait(_TimedOut(reply)), tick=tick)
+    sessions.add(_REPL_SESSION, bot)
+    timers = asyncio.create_task(sessions.run_timers())
+    try:
+        await _repl_loop(sessions, bot, lines, interactive, show_intent, profile)
+    finally:
+        timers.cancel()
+
+
+async def _repl_loop(
+    sessions: SessionManager,
+    bot: interpreter.Interpreter,
+    lines: "asyncio.Queue[Any]",
+    interactive: bool,
+    show_intent: bool,
+    profile: Optional[StartupProfile],
+) -> None:
+    pending: Any = _NOTHING
+    while True:
+        if pending is _NOTHING:
+            if interactive:
+                print("> ", end="", flush=True)
+            item = await lines.get()
+        else:
+            item, pending = pending, _NOTHING
+
+        if item is None:
+            print()
+            break
+        if isinstance(item, _TimedOut):
+            print(item.reply)
+            if bot.ended:
+                break
+            continue
+        user_text = item
+        if user_text.strip().lower() in {"exit", "quit"}:
+            break
+
+        turn_started = time.perf_counter()
+        turn = asyncio.ensure_future(sessions.process(_REPL_SESSION, user_text))
+        if interactive:
+            next_line = asyncio.ensure_future(lines.get())
+            await asyncio.wait({turn, next_line}, return_when=asyncio.FIRST_COMPLETED)
+            if not turn.done():
+                turn.cancel()
+                logging.info("Input superseded before classification finished: %r", user_text)
+                pending = next_line.result()
+                continue
+            if next_line.done():
+                pending = next_line.result()
+            else:
+                next_line.cancel()
+        reply = await turn
+        if profile is not None:
+            profile.record("first_turn", time.perf_counter() - turn_started)
+        print(reply)
+        if show_intent:
+            logging.info("current_state=%s ended=%s", bot.current_state, bot.ended)
+        if bot.ended:
+            break
+
+
+async def _run_session(
+    bot: interpreter.Interpreter,
+    idle_timeout: Optional[float],
+    interactive: bool,
+    show_intent: bool,
+    profile: Optional[StartupProfile] = None,
+) -> None:
+    lines: "asyncio.Queue[Any]" = asyncio.Queue()
+    pump = asyncio.create_task(_pump_stdin(lines))
+    try:
+        await _run_repl(bot, lines, idle_timeout, interactive, show_intent, profile)
+    finally:
+        pump.cancel()
+
+
+async def _run_batch(runner: BatchRunner) -> Dict[str, int]:
+    lines: "asyncio.Queue[Any]" = asyncio.Queue()
+    pump = asyncio.create_task(_pump_stdin(lines))
+    try:
+        return await runner.run(lines)
+    finally:
+        pump.cancel()
+
+
+def _run_batch_cli(
+    scenario: Any,
+    intent_service: IntentService,
+    concurrency: int,
+    flow_profiler: Optional[FlowProfiler] = None,
+    context_turns: int = 0,
+) -> None:
+    # stdout carries JSONL only; banners and stats go to the log
+    runner = BatchRunner(
+        scenario,
+        intent_service,
+        sys.stdout.buffer,
+        concurrency=concurrency,
+        on_session=flow_profiler.attach if flow_profiler else None,
+        context_turns=context_turns,
+    )
+    try:
+        stats = asyncio.run(_run_batch(runner))
+    except KeyboardInterrupt:
+        sys.stdout.buffer.flush()
+        return
+    logging.info("Batch finished: %s", stats)
+    _log_intent_stats(intent_service)
+
+
+def _run_check(scenario: Any) -> int:
+    report = analysis.analyze(scenario)
+    print(
+        f"[{scenario.name}] states={len(scenario.states)} reachable={len(report.reachable)} "
+        f"cycles={len(report.cycles)}"
     )
+    print(f"[{scenario.name}] {analysis.memory_footprint(scenario).summary()}")
+    for message in report.warnings():
+        print(f"warning: {message}")
+    return 0 if report.ok else 1
 
 
-def run_cli() -> None:
+def _build_arg_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="DSL Agent CLI")
     parser.add_argument("script", help="Path to DSL script file")
     parser.add_argument("--config", help="Optional config file (ini)")
@@ -152,13 +437,84 @@ def run_cli() -> None:
         type=float,
         help="Seconds to wait for user input before auto-triggering default (<=0 disables)",
     )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Read {session, text} JSON or plain lines from stdin and write replies as JSONL",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Analyze the script (reachability, dead states, cycles) and exit",
+    )
+    parser.add_argument("--concurrency", type=int, default=32, help="Max concurrent turns in --batch mode")
+    parser.add_argument(
+        "--stub-mapping",
+        dest="stub_mapping",
+        help="JSON state -> trigger -> intent map; implies --use-stub (typo-tolerant matching) "
+        "unless --no-stub is given, in which case it is the exact-match tier before the LLM",
+    )
+    parser.add_argument(
+        "--context-turns",
+        type=int,
+        help="Include the last N turns of the session in LLM classification prompts (0 disables)",
+    )
+    parser.add_argument(
+        "--warm-up",
+        dest="warm_up",
+        action="store_true",
+        help="Connect to the LLM endpoint in the background while starting up",
+    )
+    parser.add_argument(
+        "--llm-scoring",
+        dest="llm_scoring",
+        choices=["generate", "logprobs"],
+        help="LLM classification mode: free-text label (default) or one-token option letters scored by logprobs",
+    )
+    parser.add_argument(
+        "--shadow",
+        help="Also classify sampled turns with this candidate ([NAME=]BACKEND[:key=value,...]) "
+        "in the background and log agreement/latency on exit",
+    )
+    parser.add_argument(
+        "--shadow-sample-rate",
+        dest="shadow_sample_rate",
+        type=float,
+        help="Fraction of turns sent to the --shadow candidate (default 1.0)",
+    )
+    parser.add_argument(
+        "--profile-flow",
+        dest="profile_flow",
+        help="Write per-state/transition flow profile JSON here (plus .dot and .folded) on exit",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        dest="profile_startup",
+        action="store_true",
+        help="Print import/config/parse/backend/first-turn timings to stderr",
+    )
     parser.set_defaults(use_stub=None, show_intent=None)
-    args = parser.parse_args()
+    return parser
+
 
-    config_data = _load_config(args.config)
+def run_cli(import_seconds: Optional[float] = None) -> None:
+    """Entry point; ``import_seconds`` is how long importing the CLI took, if the caller measured it."""
+    args = _build_arg_parser().parse_args()
+    profile = StartupProfile(import_seconds) if args.profile_startup else None
+
+    config_data = load_config(args.config)
     settings = _resolve_settings(args, config_data)
+    if profile:
+        profile.mark("config")
 
     dsl_scenario = dsl_parser.parse_script(args.script)
+    if profile:
+        profile.mark("parse")
+    if args.check:
+        status = _run_check(dsl_scenario)
+        if profile:
+            print(profile.report(), file=sys.stderr)
+        sys.exit(status)
 
     # 默认日志目录：项目当前工作目录下 logs/<scenario>.log
     if not settings.get("log_file"):
@@ -180,9 +536,26 @@ def run_cli() -> None:
         format="%(asctime)s %(levelname)s %(name)s: %(message)s",
         handlers=log_handlers,
     )
+    if profile:
+        profile.mark("logging")
 
     intent_service = _build_intent_service(settings, scenario_name=dsl_scenario.name)
-    bot = interpreter.Interpreter(dsl_scenario, intent_service)
+    if settings.get("shadow"):
+        intent_service = _build_shadow(settings, intent_service, dsl_scenario)
+    if profile:
+        profile.mark("backend")
+    flow_profiler = FlowProfiler(dsl_scenario) if args.profile_flow else None
+    if args.batch:
+        _run_batch_cli(dsl_scenario, intent_service, args.concurrency, flow_profiler, settings["context_turns"])
+        if flow_profiler:
+            flow_profiler.write(args.profile_flow)
+        if profile:
+            profile.mark("batch", startup=False)
+            print(profile.report(), file=sys.stderr)
+        return
+    bot = interpreter.Interpreter(dsl_scenario, intent_service, context_turns=settings["context_turns"])
+    if flow_profiler:
+        flow_profiler.attach(bot)
 
     if settings.get("log_file"):
         print(f"[{dsl_scenario.name}] ready. Logs -> {settings['log_file']}. Type 'exit' to quit.")
@@ -194,47 +567,25 @@ def run_cli() -> None:
         print(welcome)
     else:
         print(f"欢迎使用 {dsl_scenario.name}，请输入问题（输入 exit/quit 退出）。")
-    idle_timeout = settings.get("idle_timeout")
-
-    def read_input_with_timeout(prompt: str) -> Optional[str]:
-        """Read a line with optional timeout. Return None on EOF."""
-        if idle_timeout is None or idle_timeout <= 0:
-            try:
-                return input(prompt)
-            except EOFError:
-                return None
-        # use select to wait for stdin
-        print(prompt, end="", flush=True)
-        rlist, _, _ = select.select([sys.stdin], [], [], idle_timeout)
-        if not rlist:
-            return ""  # timeout -> empty string to trigger default
-        line = sys.stdin.readline()
-        if not line:
-            return None
-        return line.rstrip("\n")
-
-    while True:
-        try:
-            user_text = read_input_with_timeout("> ")
-        except KeyboardInterrupt:
-            print()
-            break
-        if user_text is None:
-            print()
-            break
-        if user_text.strip().lower() in {"exit", "quit"}:
-            break
-        if user_text == "" and idle_timeout and idle_timeout > 0:
-            # timeout path, log for debugging
-            logging.info("Idle timeout %.2fs reached, triggering default flow", idle_timeout)
-        reply = bot.process_input(user_text)
-        print(reply)
-        if settings["show_intent"]:
-            logging.info("current_state=%s ended=%s", bot.current_state, bot.ended)
-        if bot.ended:
-            break
+    try:
+        asyncio.run(
+            _run_session(
+                bot,
+                idle_timeout=settings.get("idle_timeout"),
+                interactive=sys.stdin.isatty(),
+                show_intent=settings["show_intent"],
+                profile=profile,
+            )
+        )
+    except KeyboardInterrupt:
+        print()
 
+    _log_intent_stats(intent_service)
     print("Conversation ended.")
+    if flow_profiler:
+        flow_profiler.write(args.profile_flow)
+    if profile:
+        print(profile.report(), file=sys.stderr)
 
 
 if __name__ == "__main__":
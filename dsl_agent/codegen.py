@@ -0,0 +1,195 @@
+"""
+Ahead-of-time compilation of a Scenario into a Python module.
+
+The generated module has one dispatch function per state. Each function
+maps an intent label (or None) and the user's text to
+``(reply, next_state or None, matched intent or "default")``. Replies
+without ``{user_input}`` are string constants. Templated replies are
+pre-split into tuples, so formatting one is a single ``join``. States with
+many intents dispatch through a constant dict instead of an ``if`` chain.
+
+The module does not import dsl_agent. It is byte-compiled when written,
+so loading it later is a plain ``.pyc`` import with no parsing.
+
+    python -m dsl_agent.codegen tests/data/travel_bot.dsl -o travel_bot_gen.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import pathlib
+import py_compile
+import sys
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import parser as dsl_parser
+from .intent_service import IntentService
+from .interpreter import Interpreter, TurnListener
+from .model import Scenario, State, Transition
+
+FORMAT_VERSION = 1
+# above this many intents a state dispatches through a dict rather than an if chain
+TABLE_DISPATCH_MIN = 8
+
+Dispatch = Callable[[Optional[str], str], Tuple[str, Optional[str], str]]
+
+
+class _Emitter:
+    def __init__(self) -> None:
+        self.constants: List[str] = []
+        self.functions: List[str] = []
+        self._names: Dict[Tuple[str, ...], str] = {}
+
+    def parts(self, response: str) -> str:
+        """Name of a shared constant tuple holding the reply split around {user_input}."""
+        parts = tuple(response.split("{user_input}"))
+        name = self._names.get(parts)
+        if name is None:
+            name = self._names[parts] = f"_P{len(self._names)}"
+            self.constants.append(f"{name} = {parts!r}")
+        return name
+
+    def reply_expr(self, response: str) -> str:
+        if "{user_input}" not in response:
+            return repr(response)
+        return f"user_input.join({self.parts(response)})"
+
+    def state(self, index: int, state: State) -> str:
+        func = f"state_{state.name}"
+        lines = [f"def {func}(intent, user_input):"]
+        if len(state.intents) >= TABLE_DISPATCH_MIN:
+            table = f"_T{index}"
+            entries = ", ".join(
+                f"{intent!r}: ({self.parts(t.response)}, {t.next_state!r}, {intent!r})"
+                for intent, t in state.intents.items()
+            )
+            self.constants.append(f"{table} = {{{entries}}}")
+            lines += [
+                f"    hit = {table}.get(intent)",
+                "    if hit is not None:",
+                "        return user_input.join(hit[0]), hit[1], hit[2]",
+            ]
+        else:
+            for intent, transition in state.intents.items():
+                lines += [
+                    f"    if intent == {intent!r}:",
+                    f"        return {self._result(transition, intent)}",
+                ]
+        lines.append(f"    return {self._result(state.default, 'default')}")
+        self.functions.append("\n".join(lines))
+        return func
+
+    def _result(self, transition: Transition, matched: str) -> str:
+        return f"{self.reply_expr(transition.response)}, {transition.next_state!r}, {matched!r}"
+
+
+def generate_source(scenario: Scenario) -> str:
+    """Python source for ``scenario``; deterministic for a given scenario."""
+    emitter = _Emitter()
+    entries = []
+    for index, state in enumerate(scenario.states.values()):
+        func = emitter.state(index, state)
+        entries.append(f"    {state.name!r}: ({func}, {tuple(state.intents)!r}, {state.timeout!r}),")
+    out = [
+        f'"""Generated by dsl_agent.codegen from scenario {scenario.name!r}; do not edit."""',
+        "",
+        f"FORMAT_VERSION = {FORMAT_VERSION}",
+        f"SCENARIO = {scenario.name!r}",
+        f"INITIAL_STATE = {scenario.initial_state!r}",
+        "",
+        *emitter.constants,
+        "",
+    ]
+    for function in emitter.functions:
+        out += ["", function, ""]
+    out += ["", "# state -> (dispatch, intents, timeout)", "STATES = {", *entries, "}", ""]
+    return "\n".join(out)
+
+
+def compile_scenario(scenario: Scenario, path: str) -> str:
+    """Write the generated module to ``path`` and byte-compile it; returns ``path``."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(generate_source(scenario))
+    py_compile.compile(path, doraise=True)
+    return path
+
+
+@dataclass
+class CompiledState:
+    name: str
+    intents: Tuple[str, ...]
+    dispatch: Dispatch
+    timeout: Optional[float] = None
+
+
+@dataclass
+class CompiledScenario:
+    """Scenario-shaped view of a generated module, accepted by CompiledInterpreter."""
+
+    name: str
+    states: Dict[str, CompiledState]
+    initial_state: str
+
+    def get_state(self, name: str) -> CompiledState:
+        try:
+            return self.states[name]
+        except KeyError as exc:
+            raise KeyError(f"State '{name}' not found in scenario '{self.name}'") from exc
+
+
+def from_module(module: ModuleType) -> CompiledScenario:
+    version = getattr(module, "FORMAT_VERSION", None)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Generated module format {version!r} is not supported (expected {FORMAT_VERSION})")
+    states = {
+        name: CompiledState(name, intents, dispatch, timeout)
+        for name, (dispatch, intents, timeout) in module.STATES.items()
+    }
+    return CompiledScenario(name=module.SCENARIO, states=states, initial_state=module.INITIAL_STATE)
+
+
+def load_compiled(path: str) -> CompiledScenario:
+    """Import a generated module (through the regular bytecode cache)."""
+    module_path = pathlib.Path(path)
+    spec = importlib.util.spec_from_file_location(f"_dsl_generated_{module_path.stem}", module_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load generated module {path}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return from_module(module)
+
+
+class CompiledInterpreter(Interpreter):
+    """Interpreter whose transitions come from the generated dispatch functions."""
+
+    def __init__(
+        self,
+        scenario: CompiledScenario,
+        intent_service: IntentService,
+        listeners: Optional[List[TurnListener]] = None,
+        context_turns: int = 0,
+    ):
+        super().__init__(scenario, intent_service, listeners, context_turns)  # type: ignore[arg-type]
+
+    def _route(self, state, intent: Optional[str], user_text: str) -> Tuple[str, Optional[str], str]:  # type: ignore[override]
+        return state.dispatch(intent, user_text)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compile a DSL script into a Python module")
+    parser.add_argument("script", help="Path to DSL script")
+    parser.add_argument("-o", "--output", help="Output .py path (default: <script>_gen.py next to the script)")
+    args = parser.parse_args(argv)
+
+    scenario = dsl_parser.parse_script(args.script)
+    script = pathlib.Path(args.script)
+    output = args.output or str(script.with_name(f"{script.stem}_gen.py"))
+    compile_scenario(scenario, output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
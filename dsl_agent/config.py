@@ -0,0 +1,71 @@
+"""
+Config file loading shared by the CLI and the evaluation harness.
+"""
+
+from __future__ import annotations
+
+import configparser
+from typing import Any, Dict, Optional
+
+
+def str_to_bool(value: Optional[str], default: bool) -> bool:
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "y", "on"}
+
+
+def load_config(path: Optional[str]) -> Dict[str, Any]:
+    """
+    Read an INI config into a flat settings dict.
+
+    [llm] and [settings] keys are merged at the top level; the per-scenario
+    sections become nested dicts: [intent_descriptions.<scenario>] ->
+    ``intent_descriptions``, [intent_keywords.<scenario>] -> ``intent_keywords``
+    (comma-separated lists) and [welcome.<scenario>] -> ``welcome_messages``.
+    """
+    if not path:
+        return {}
+    config = configparser.ConfigParser()
+    config.read(path)
+    data: Dict[str, Any] = {}
+    if "llm" in config:
+        data.update(config["llm"])
+    if "settings" in config:
+        data.update(config["settings"])
+    # intent_descriptions sections: [intent_descriptions.<scenario>]
+    descriptions: Dict[str, Dict[str, str]] = {}
+    prefix = "intent_descriptions."
+    for section in config.sections():
+        if section.startswith(prefix):
+            scenario_name = section[len(prefix) :]
+            descriptions[scenario_name] = dict(config[section])
+    if descriptions:
+        data["intent_descriptions"] = descriptions
+
+    # intent keywords for the local cascade tier: [intent_keywords.<scenario>]
+    keywords: Dict[str, Dict[str, list]] = {}
+    keywords_prefix = "intent_keywords."
+    for section in config.sections():
+        if section.startswith(keywords_prefix):
+            scenario_name = section[len(keywords_prefix) :]
+            keywords[scenario_name] = {
+                intent: [kw.strip() for kw in value.strip().strip('"').split(",") if kw.strip()]
+                for intent, value in config[section].items()
+            }
+    if keywords:
+        data["intent_keywords"] = keywords
+
+    # welcome message per scenario: [welcome.<scenario>]
+    welcomes: Dict[str, str] = {}
+    welcome_prefix = "welcome."
+    for section in config.sections():
+        if section.startswith(welcome_prefix):
+            scenario_name = section[len(welcome_prefix) :]
+            # take first key/value as the message; or empty section -> skip
+            if config[section]:
+                # pick the first item
+                first_key = next(iter(config[section]))
+                welcomes[scenario_name] = config[section][first_key]
+    if welcomes:
+        data["welcome_messages"] = welcomes
+    return data
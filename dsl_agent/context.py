@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import sys
+from collections import deque
+from typing import Deque, List, Tuple
+
+# (utterance, intent, state); intent/state strings are interned and shared
+ContextTurn = Tuple[str, str, str]
+
+
+class ConversationContext:
+    """
+    Bounded per-session ring buffer of recent turns for context-aware classification.
+
+    Keeps at most ``max_turns`` entries; each utterance is truncated to
+    ``max_utterance_chars`` and the oldest entries are evicted while the stored
+    utterances exceed ``max_total_chars``, so memory per session is hard-capped.
+    """
+
+    __slots__ = ("max_turns", "max_utterance_chars", "max_total_chars", "_turns", "_chars")
+
+    def __init__(self, max_turns: int = 4, max_utterance_chars: int = 80, max_total_chars: int = 320) -> None:
+        if max_turns < 1:
+            raise ValueError("max_turns must be >= 1")
+        self.max_turns = max_turns
+        self.max_utterance_chars = max_utterance_chars
+        self.max_total_chars = max_total_chars
+        self._turns: Deque[ContextTurn] = deque()
+        self._chars = 0
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    @property
+    def turns(self) -> List[ContextTurn]:
+        return list(self._turns)
+
+    def append(self, utterance: str, intent: str, state: str) -> None:
+        utterance = " ".join(utterance.split())[: self.max_utterance_chars]
+        self._turns.append((utterance, sys.intern(intent), sys.intern(state)))
+        self._chars += len(utterance)
+        while len(self._turns) > self.max_turns or (self._chars > self.max_total_chars and len(self._turns) > 1):
+            self._chars -= len(self._turns.popleft()[0])
+
+    def snapshot(self) -> "ConversationContext":
+        """Independent copy, for classifiers that read the context after the turn has moved on."""
+        copy = ConversationContext(self.max_turns, self.max_utterance_chars, self.max_total_chars)
+        copy._turns.extend(self._turns)
+        copy._chars = self._chars
+        return copy
+
+    def clear(self) -> None:
+        self._turns.clear()
+        self._chars = 0
+
+    def summary(self) -> str:
+        """Oldest-first one-line form for prompts, e.g. ``start/greeting: "hi" | routing/default: "嗯"``."""
+        return " | ".join(f'{state}/{intent}: "{utterance}"' for utterance, intent, state in self._turns)
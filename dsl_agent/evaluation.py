@@ -0,0 +1,278 @@
+"""
+Offline classifier evaluation harness.
+
+Runs one or more intent classifiers over a labeled JSONL dataset and reports
+accuracy, a per-state confusion matrix, latency percentiles and token cost,
+so the cheapest classifier that meets an accuracy bar can be picked.
+
+Dataset lines: {"scenario": "travel_bot.dsl", "state": "routing", "text": "...", "expected": "ask_order"}
+(``expected`` null or "none" means the classifier should abstain). Scenario
+paths are resolved relative to the dataset file first.
+
+Classifier specs: ``[NAME=]BACKEND[:key=value,...]``, e.g.
+
+    stub:mapping=tests/data/golden_travel.json
+    typo=fuzzy:mapping=tests/data/golden_travel.json
+    qwen-8=llm:model=qwen-plus,max_tokens=8,price_per_1k=0.004
+    terse=llm:model=qwen-plus,system_prompt=@prompts/terse.txt
+
+``mapping``/``keywords`` values are JSON files, ``@path`` values are read
+as text, and ``price_per_1k`` is consumed by the harness. LLM backends
+take api_base/api_key/model/intent descriptions from ``--config`` and the
+DSL_* environment variables unless the spec sets them.
+
+    python -m dsl_agent.evaluation data.jsonl --classifier stub:mapping=m.json --classifier llm
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import pathlib
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from . import parser as dsl_parser
+from .config import load_config
+from .intent_service import IntentService, load_backend, load_stub_mapping, metered, split_intent_result
+from .model import Scenario
+from .stats import summarize
+
+NONE_LABEL = "none"
+
+
+@dataclass
+class EvalItem:
+    scenario: str  # resolved script path
+    state: str
+    text: str
+    expected: str  # NONE_LABEL when the classifier should abstain
+
+
+@dataclass
+class ClassifierSpec:
+    name: str
+    backend: str
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+def load_dataset(path: str) -> List[EvalItem]:
+    base = pathlib.Path(path).parent
+    items: List[EvalItem] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                scenario = pathlib.Path(record["scenario"])
+                if not scenario.is_absolute() and (base / scenario).exists():
+                    scenario = base / scenario
+                expected = record.get("expected") or NONE_LABEL
+                items.append(EvalItem(str(scenario), record["state"], record["text"], expected.strip().lower()))
+            except (ValueError, KeyError, AttributeError) as exc:
+                raise ValueError(f"{path}:{lineno}: invalid dataset record ({exc})") from exc
+    return items
+
+
+def _coerce(key: str, value: str) -> Any:
+    if value.startswith("@"):
+        with open(value[1:], "r", encoding="utf-8") as f:
+            return f.read()
+    if key == "mapping":
+        return load_stub_mapping(value)
+    if key == "keywords":
+        with open(value, "r", encoding="utf-8") as f:
+            return json.load(f)
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def parse_classifier_spec(spec: str) -> ClassifierSpec:
+    eq, colon = spec.find("="), spec.find(":")
+    name = None
+    if eq != -1 and (colon == -1 or eq < colon):
+        name, spec = spec[:eq], spec[eq + 1 :]
+    backend, _, raw = spec.partition(":")
+    params: Dict[str, Any] = {}
+    for part in filter(None, raw.split(",")):
+        key, sep, value = part.partition("=")
+        if not sep:
+            raise ValueError(f"Invalid classifier parameter '{part}' (expected key=value)")
+        params[key.strip()] = _coerce(key.strip(), value.strip())
+    return ClassifierSpec(name=name or backend, backend=backend, params=params)
+
+
+def default_factory(settings: Dict[str, Any]) -> Callable[[ClassifierSpec, Scenario], IntentService]:
+    """Build services from specs; LLM defaults come from ``settings`` (config + env)."""
+
+    def build(spec: ClassifierSpec, scenario: Scenario) -> IntentService:
+        params = {k: v for k, v in spec.params.items() if k != "price_per_1k"}
+        if spec.backend == "llm":
+            for key in ("api_base", "api_key", "model"):
+                params.setdefault(key, settings.get(key) or "")
+            descriptions = (settings.get("intent_descriptions") or {}).get(scenario.name)
+            if descriptions:
+                params.setdefault("intent_descriptions", descriptions)
+        return load_backend(spec.backend)(**params)
+
+    return build
+
+
+class Evaluator:
+    def __init__(
+        self,
+        items: List[EvalItem],
+        factory: Callable[[ClassifierSpec, Scenario], IntentService],
+        concurrency: int = 8,
+    ) -> None:
+        self.items = items
+        self.factory = factory
+        self.concurrency = concurrency
+        self.scenarios: Dict[str, Scenario] = {}
+        for item in items:
+            if item.scenario not in self.scenarios:
+                self.scenarios[item.scenario] = dsl_parser.parse_script(item.scenario)
+
+    async def evaluate(self, spec: ClassifierSpec) -> Dict[str, Any]:
+        services: Dict[str, IntentService] = {}
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_one(item: EvalItem) -> Dict[str, Any]:
+            scenario = self.scenarios[item.scenario]
+            if item.scenario not in services:
+                services[item.scenario] = self.factory(spec, scenario)
+            service = services[item.scenario]
+            key = f"{scenario.name}.{item.state}"
+            if item.state not in scenario.states:
+                return {"key": key, "expected": item.expected, "predicted": None, "error": "unknown state"}
+            intents = list(scenario.states[item.state].intents)
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    with metered() as meter:
+                        result = service.identify(item.text, item.state, intents)
+                        if inspect.isawaitable(result):
+                            result = await result
+                except Exception as exc:  # a crashing classifier counts as wrong, not fatal
+                    return {"key": key, "expected": item.expected, "predicted": None, "error": str(exc)}
+                elapsed = time.perf_counter() - started
+            label, _ = split_intent_result(result)
+            if label not in intents:
+                label = None
+            return {
+                "key": key,
+                "expected": item.expected,
+                "predicted": label or NONE_LABEL,
+                "seconds": elapsed,
+                "tokens": meter.tokens,
+            }
+
+        outcomes = await asyncio.gather(*(run_one(item) for item in self.items))
+        return self._report(spec, outcomes)
+
+    def _report(self, spec: ClassifierSpec, outcomes: List[Dict[str, Any]]) -> Dict[str, Any]:
+        per_state: Dict[str, Dict[str, Any]] = {}
+        correct = errors = tokens = 0
+        latencies: List[float] = []
+        for outcome in outcomes:
+            state = per_state.setdefault(outcome["key"], {"items": 0, "correct": 0, "confusion": {}})
+            state["items"] += 1
+            if "error" in outcome:
+                errors += 1
+                predicted = "error"
+            else:
+                predicted = outcome["predicted"]
+                latencies.append(outcome["seconds"])
+                tokens += outcome["tokens"]
+            row = state["confusion"].setdefault(outcome["expected"], {})
+            row[predicted] = row.get(predicted, 0) + 1
+            if predicted == outcome["expected"]:
+                correct += 1
+                state["correct"] += 1
+        for state in per_state.values():
+            state["accuracy"] = state["correct"] / state["items"]
+        total = len(outcomes)
+        price = float(spec.params.get("price_per_1k", 0.0))
+        return {
+            "name": spec.name,
+            "backend": spec.backend,
+            "items": total,
+            "correct": correct,
+            "accuracy": correct / total if total else 0.0,
+            "errors": errors,
+            "latency_ms": {k: (v * 1000 if k != "count" else v) for k, v in summarize(latencies).items()},
+            "tokens": tokens,
+            "tokens_per_item": tokens / total if total else 0.0,
+            "cost": tokens / 1000 * price,
+            "per_state": per_state,
+        }
+
+
+def format_reports(reports: List[Dict[str, Any]], show_confusion: bool = True) -> str:
+    lines = [f"{'classifier':<20} {'accuracy':>8} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8} {'tokens':>8} {'cost':>8}"]
+    for report in reports:
+        latency = report["latency_ms"]
+        lines.append(
+            f"{report['name']:<20} {report['accuracy']:>8.2%} {latency['p50']:>8.2f} {latency['p95']:>8.2f} "
+            f"{latency['p99']:>8.2f} {report['tokens']:>8} {report['cost']:>8.4f}"
+        )
+    if show_confusion:
+        for report in reports:
+            lines.append("")
+            lines.append(f"[{report['name']}] confusion (expected -> predicted: count)")
+            for key, state in report["per_state"].items():
+                lines.append(f"  {key}: accuracy={state['accuracy']:.2%} ({state['correct']}/{state['items']})")
+                for expected, row in state["confusion"].items():
+                    cells = ", ".join(f"{predicted}: {count}" for predicted, count in sorted(row.items()))
+                    lines.append(f"    {expected} -> {cells}")
+    return "\n".join(lines)
+
+
+def _settings_from(config_path: Optional[str]) -> Dict[str, Any]:
+    settings = load_config(config_path)
+    for key in ("api_base", "api_key", "model"):
+        settings[key] = os.getenv(f"DSL_{key.upper()}", settings.get(key))
+    return settings
+
+
+async def evaluate_all(evaluator: Evaluator, specs: List[ClassifierSpec]) -> List[Dict[str, Any]]:
+    # one classifier at a time so their latencies don't interfere
+    return [await evaluator.evaluate(spec) for spec in specs]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Evaluate intent classifiers on a labeled dataset")
+    parser.add_argument("dataset", help="JSONL with scenario/state/text/expected")
+    parser.add_argument(
+        "--classifier",
+        action="append",
+        required=True,
+        help="[NAME=]BACKEND[:key=value,...]; repeat to compare classifiers",
+    )
+    parser.add_argument("--config", help="INI config supplying LLM settings and intent descriptions")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent requests per classifier")
+    parser.add_argument("--json", dest="json_path", help="Also write the full reports as JSON to this path")
+    parser.add_argument("--no-confusion", action="store_true", help="Only print the summary table")
+    args = parser.parse_args(argv)
+
+    specs = [parse_classifier_spec(spec) for spec in args.classifier]
+    evaluator = Evaluator(load_dataset(args.dataset), default_factory(_settings_from(args.config)), args.concurrency)
+    reports = asyncio.run(evaluate_all(evaluator, specs))
+    print(format_reports(reports, show_confusion=not args.no_confusion))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,394 @@
+"""
+Local stand-in for an OpenAI-compatible chat-completions endpoint.
+
+Classification is delegated to any IntentService (by default one that
+echoes an allowed intent label found in the utterance), and every response
+can be delayed, failed with 429/5xx, or streamed slowly, so LLM-path
+retries, timeouts and concurrency can be benchmarked offline. Record mode
+proxies to a real endpoint and appends responses to a JSONL file that
+replay mode serves back verbatim.
+
+    python -m dsl_agent.fake_llm --port 8808 --latency lognormal:-3,0.5 --rate-429 0.05
+    python main.py tests/data/travel_bot.dsl --api-base http://127.0.0.1:8808/v1 --api-key x --model fake
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import inspect
+import json
+import math
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .intent_service import IntentService, StubIntentService, split_intent_result
+
+# matches LLMIntentService._build_prompt
+_PROMPT = re.compile(
+    r"Current state: (?P<state>.*?)\. Allowed intents: \[(?P<intents>.*?)\]\. User said: \"(?P<text>.*?)\"\.",
+    re.DOTALL,
+)
+
+# "A=ask_order" options of LLMIntentService._build_choice_prompt
+_CHOICE = re.compile(r"^([A-Z])=(.+)$")
+
+
+def parse_prompt(prompt: str) -> Tuple[str, List[str], str]:
+    """Extract (state, intents, text) from a classification prompt; empty values if it doesn't match."""
+    state, options, text = _parse(prompt)
+    # the scoring prompt lists "none" as an option; it is not an intent
+    return state, [intent for letter, intent in options if not (letter and intent == "none")], text
+
+
+def parse_choices(prompt: str) -> Dict[str, str]:
+    """Intent -> option letter of a logprob scoring prompt (includes "none"); empty for plain prompts."""
+    return {intent: letter for letter, intent in _parse(prompt)[1] if letter}
+
+
+def _parse(prompt: str) -> Tuple[str, List[Tuple[str, str]], str]:
+    match = _PROMPT.search(prompt)
+    if not match:
+        return "", [], prompt
+    options = []
+    for part in match.group("intents").split(";"):
+        label = part.split(":", 1)[0].strip()
+        if not label:
+            continue
+        choice = _CHOICE.match(label)
+        options.append((choice.group(1), choice.group(2)) if choice else ("", label))
+    return match.group("state"), options, match.group("text")
+
+
+class LabelEchoIntentService:
+    """Default fake classifier: the first allowed intent whose label occurs in the text."""
+
+    async def identify(self, text: str, state: str, intents: List[str]) -> Optional[str]:
+        lowered = text.lower()
+        for intent in intents:
+            if intent in lowered or intent.replace("_", " ") in lowered:
+                return intent
+        return None
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Latency distribution in seconds: ``fixed:S``, ``uniform:LO,HI``,
+    ``normal:MEAN,STD`` or ``lognormal:MU,SIGMA``. Negative samples clamp to 0.
+    """
+    kind, _, raw = spec.partition(":")
+    try:
+        params = [float(p) for p in raw.split(",")] if raw else []
+    except ValueError as exc:
+        raise ValueError(f"Invalid latency spec '{spec}'") from exc
+    samplers: Dict[str, Tuple[int, Callable[..., float]]] = {
+        "fixed": (1, lambda rng, s: s),
+        "uniform": (2, lambda rng, lo, hi: rng.uniform(lo, hi)),
+        "normal": (2, lambda rng, mean, std: rng.gauss(mean, std)),
+        "lognormal": (2, lambda rng, mu, sigma: rng.lognormvariate(mu, sigma)),
+    }
+    if kind not in samplers or len(params) != samplers[kind][0]:
+        raise ValueError(f"Invalid latency spec '{spec}'")
+    sampler = samplers[kind][1]
+    return lambda rng: max(0.0, sampler(rng, *params))
+
+
+def request_key(body: Dict[str, Any]) -> str:
+    """Stable record/replay key for a request body (streaming flag ignored)."""
+    canonical = {k: v for k, v in body.items() if k not in {"stream", "stream_options"}}
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class FakeLLMConfig:
+    classifier: IntentService = field(default_factory=LabelEchoIntentService)
+    latency: Optional[Callable[[random.Random], float]] = None
+    rate_429: float = 0.0
+    rate_5xx: float = 0.0
+    stream_chunk_delay: float = 0.0
+    seed: Optional[int] = None
+    record_path: Optional[str] = None
+    replay_path: Optional[str] = None
+    upstream: Optional[str] = None
+    upstream_key: Optional[str] = None
+
+
+class FakeLLMServer:
+    """Threaded HTTP server; ``start()`` returns the ``.../v1`` base URL."""
+
+    def __init__(self, config: Optional[FakeLLMConfig] = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.config = config or FakeLLMConfig()
+        self.rng = random.Random(self.config.seed)
+        self.stats = {"requests": 0, "injected_429": 0, "injected_5xx": 0, "replay_misses": 0}
+        self._lock = threading.Lock()
+        self._replay: Dict[str, Dict[str, Any]] = {}
+        if self.config.replay_path:
+            with open(self.config.replay_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._replay[entry["key"]] = entry
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-llm", daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeLLMServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+    # --- request handling -------------------------------------------------
+
+    def _draw(self) -> Tuple[float, float]:
+        with self._lock:
+            self.stats["requests"] += 1
+            delay = self.config.latency(self.rng) if self.config.latency else 0.0
+            return delay, self.rng.random()
+
+    def _classify(self, body: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """(content, logprobs or None); scoring prompts are answered with an option letter."""
+        messages = body.get("messages") or []
+        prompt = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+        state, intents, text = parse_prompt(prompt)
+        result = self.config.classifier.identify(text, state, intents)
+        if inspect.isawaitable(result):
+            result = asyncio.run(result)
+        label, confidence = split_intent_result(result)
+        if label not in intents:
+            label, confidence = "none", 1.0
+        choices = parse_choices(prompt)
+        if not choices:
+            return label, None
+        content = choices[label]
+        if not body.get("logprobs"):
+            return content, None
+        return content, _choice_logprobs(choices, content, confidence, int(body.get("top_logprobs") or 0))
+
+    def _completion(
+        self,
+        body: Dict[str, Any],
+        content: str,
+        logprobs: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        prompt_chars = sum(len(str(m.get("content", ""))) for m in body.get("messages") or [])
+        prompt_tokens = max(1, prompt_chars // 4)
+        completion_tokens = max(1, len(content) // 4)
+        return {
+            "id": f"chatcmpl-fake-{self.stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "logprobs": logprobs,
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def _upstream(self, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        assert self.config.upstream is not None
+        request = urllib.request.Request(
+            self.config.upstream.rstrip("/") + "/chat/completions",
+            data=json.dumps(dict(body, stream=False)).encode("utf-8"),
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self.config.upstream_key or ''}",
+            },
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=60) as resp:
+                return resp.status, json.loads(resp.read())
+        except urllib.error.HTTPError as exc:
+            return exc.code, json.loads(exc.read() or b"{}")
+
+    def respond(self, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """Compute (status, payload) for a chat-completions request, after any injected delay."""
+        delay, roll = self._draw()
+        if delay:
+            time.sleep(delay)
+        if roll < self.config.rate_429:
+            with self._lock:
+                self.stats["injected_429"] += 1
+            return 429, _error("Rate limit reached (injected)", "rate_limit_exceeded")
+        if roll < self.config.rate_429 + self.config.rate_5xx:
+            with self._lock:
+                self.stats["injected_5xx"] += 1
+            return 503, _error("Service unavailable (injected)", "server_error")
+
+        key = request_key(body)
+        if self.config.replay_path:
+            entry = self._replay.get(key)
+            if entry is None:
+                with self._lock:
+                    self.stats["replay_misses"] += 1
+                return 404, _error("No recorded response for this request", "replay_miss")
+            return entry["status"], entry["response"]
+        if self.config.upstream:
+            status, payload = self._upstream(body)
+            if self.config.record_path:
+                with self._lock, open(self.config.record_path, "a", encoding="utf-8") as f:
+                    entry = {"key": key, "request": body, "status": status, "response": payload}
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            return status, payload
+        return 200, self._completion(body, *self._classify(body))
+
+    def _handler_class(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - stdlib signature
+                return None
+
+            def do_GET(self) -> None:
+                if self.path.rstrip("/").endswith("/models"):
+                    self._send(200, {"object": "list", "data": [{"id": "fake", "object": "model"}]})
+                else:
+                    self._send(404, _error("Not found", "not_found"))
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._send(400, _error("Invalid JSON body", "invalid_request_error"))
+                    return
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send(404, _error("Not found", "not_found"))
+                    return
+                status, payload = server.respond(body)
+                if status == 200 and body.get("stream"):
+                    self._stream(payload)
+                else:
+                    self._send(status, payload)
+
+            def _send(self, status: int, payload: Dict[str, Any]) -> None:
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                if status == 429:
+                    self.send_header("Retry-After", "0")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, payload: Dict[str, Any]) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                content = payload["choices"][0]["message"]["content"] or ""
+                base = {k: payload[k] for k in ("id", "created", "model")}
+                pieces = [content[i : i + 4] for i in range(0, len(content), 4)] or [""]
+                for i, piece in enumerate(pieces):
+                    delta = {"role": "assistant", "content": piece} if i == 0 else {"content": piece}
+                    chunk = dict(base, object="chat.completion.chunk", choices=[{"index": 0, "delta": delta, "finish_reason": None}])
+                    self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    if server.config.stream_chunk_delay:
+                        time.sleep(server.config.stream_chunk_delay)
+                done = dict(base, object="chat.completion.chunk", choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}])
+                self.wfile.write(f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+        return Handler
+
+
+def _choice_logprobs(choices: Dict[str, str], chosen: str, confidence: float, top: int) -> Dict[str, Any]:
+    """
+    Logprobs for a one-letter answer: the chosen letter gets ``0.9 * confidence``
+    of the probability mass on top of an even share of the rest.
+    """
+    letters = sorted(choices.values())
+    peak = 0.9 * min(max(confidence, 0.0), 1.0)
+    probs = {letter: (1.0 - peak) / len(letters) + (peak if letter == chosen else 0.0) for letter in letters}
+    ranked = sorted(letters, key=lambda letter: (-probs[letter], letter))
+    top_logprobs = [{"token": letter, "logprob": math.log(probs[letter]), "bytes": list(letter.encode())} for letter in ranked]
+    entry = dict(next(item for item in top_logprobs if item["token"] == chosen), top_logprobs=top_logprobs[: max(top, 0)])
+    return {"content": [entry]}
+
+
+def _error(message: str, code: str) -> Dict[str, Any]:
+    return {"error": {"message": message, "type": code, "code": code}}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8808)
+    parser.add_argument("--mapping", help="JSON file with a StubIntentService mapping (state -> trigger -> intent)")
+    parser.add_argument("--latency", help="fixed:S | uniform:LO,HI | normal:MEAN,STD | lognormal:MU,SIGMA (seconds)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--stream-chunk-delay", type=float, default=0.0, help="Seconds between streamed chunks")
+    parser.add_argument("--seed", type=int, help="Random seed for latency/error injection")
+    parser.add_argument("--upstream", help="Real endpoint base URL to proxy to (record mode)")
+    parser.add_argument("--upstream-key", help="API key for --upstream")
+    parser.add_argument("--record", help="Append proxied responses to this JSONL file")
+    parser.add_argument("--replay", help="Serve responses recorded in this JSONL file")
+    args = parser.parse_args(argv)
+    if args.record and not args.upstream:
+        parser.error("--record requires --upstream")
+
+    classifier: IntentService = LabelEchoIntentService()
+    if args.mapping:
+        with open(args.mapping, "r", encoding="utf-8") as f:
+            classifier = StubIntentService(mapping=json.load(f))
+    config = FakeLLMConfig(
+        classifier=classifier,
+        latency=parse_latency(args.latency) if args.latency else None,
+        rate_429=args.rate_429,
+        rate_5xx=args.rate_5xx,
+        stream_chunk_delay=args.stream_chunk_delay,
+        seed=args.seed,
+        record_path=args.record,
+        replay_path=args.replay,
+        upstream=args.upstream,
+        upstream_key=args.upstream_key,
+    )
+    server = FakeLLMServer(config, host=args.host, port=args.port)
+    print(f"fake LLM listening on {server.base_url}", flush=True)
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
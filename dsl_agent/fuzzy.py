@@ -0,0 +1,163 @@
+"""
+Typo-tolerant trigger matching for offline intent classification.
+
+Triggers are normalized (NFKC, which also folds full-width forms to
+half-width, then case-folding and whitespace collapsing) and indexed with
+a SymSpell-style deletes index. A lookup only generates the query's own
+deletes and verifies the few candidates it hits. Cost depends on the
+query length, not on how many triggers a state has.
+"""
+
+from __future__ import annotations
+
+import unicodedata
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .intent_service import IntentResult
+
+
+def normalize(text: str) -> str:
+    """NFKC + casefold + collapse whitespace: "  ＨＩ　there " -> "hi there"."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def _deletes(term: str, distance: int) -> Set[str]:
+    """All strings obtained by deleting up to ``distance`` characters (including ``term``)."""
+    results = {term}
+    frontier = {term}
+    for _ in range(distance):
+        frontier = {word[:i] + word[i + 1 :] for word in frontier for i in range(len(word))} - results
+        results |= frontier
+    return results
+
+
+def bounded_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal-string-alignment distance (edits + adjacent transpositions) of a and b,
+    or ``limit + 1`` as soon as it must exceed ``limit``.
+    """
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev_prev: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        ca = a[i - 1]
+        for j in range(1, len(b) + 1):
+            cost = 0 if ca == b[j - 1] else 1
+            value = min(prev[j] + 1, current[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, prev_prev[j - 2] + 1)
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > limit:
+            return limit + 1
+        prev_prev, prev = prev, current
+    return prev[-1] if prev[-1] <= limit else limit + 1
+
+
+class SymSpellIndex:
+    """
+    term -> value index answering "closest term within N edits".
+
+    Deletes are generated from the first ``prefix_length`` characters only,
+    which bounds index size for long triggers; candidates are verified on the
+    full strings.
+    """
+
+    def __init__(self, max_distance: int = 2, prefix_length: int = 7) -> None:
+        self.max_distance = max_distance
+        self.prefix_length = max(prefix_length, max_distance + 1)
+        self._exact: Dict[str, str] = {}
+        self._terms: List[Tuple[str, str]] = []
+        self._deletes: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def add(self, term: str, value: str) -> None:
+        if term in self._exact:
+            return
+        self._exact[term] = value
+        term_id = len(self._terms)
+        self._terms.append((term, value))
+        for delete in _deletes(term[: self.prefix_length], self.max_distance):
+            self._deletes.setdefault(delete, []).append(term_id)
+
+    def _candidates(self, query: str, distance: int) -> Iterator[int]:
+        seen: Set[int] = set()
+        for delete in _deletes(query[: self.prefix_length], distance):
+            for term_id in self._deletes.get(delete, ()):
+                if term_id not in seen:
+                    seen.add(term_id)
+                    yield term_id
+
+    def lookup(self, query: str, max_distance: Optional[int] = None) -> Optional[Tuple[str, str, int]]:
+        """Closest (term, value, distance) within ``max_distance`` edits; earliest added wins ties."""
+        value = self._exact.get(query)
+        if value is not None:
+            return query, value, 0
+        limit = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        if limit <= 0:
+            return None
+        best: Optional[Tuple[str, str, int]] = None
+        best_id = -1
+        for term_id in self._candidates(query, limit):
+            term, term_value = self._terms[term_id]
+            bound = limit if best is None else best[2]
+            distance = bounded_distance(query, term, bound)
+            if distance > bound:
+                continue
+            if best is None or distance < best[2] or term_id < best_id:
+                best, best_id = (term, term_value, distance), term_id
+        return best
+
+
+class FuzzyStubIntentService:
+    """
+    Normalizing, typo-tolerant variant of StubIntentService.
+
+    mapping: state -> (trigger -> intent). Text and triggers are normalized
+    before matching. Otherwise the closest trigger within the edit budget
+    wins. The budget is one edit per ``chars_per_edit`` characters, capped at
+    ``max_distance``, so short triggers must match exactly.
+    Returns (intent, confidence) where confidence = 1 - distance / length.
+    With no match, returns (default_intent, 0.0) if it is allowed, else None.
+    """
+
+    def __init__(
+        self,
+        mapping: Optional[Dict[str, Dict[str, str]]] = None,
+        default_intent: Optional[str] = None,
+        max_distance: int = 2,
+        chars_per_edit: int = 4,
+    ) -> None:
+        self.default_intent = default_intent
+        self.max_distance = max_distance
+        self.chars_per_edit = chars_per_edit
+        self.indexes: Dict[str, SymSpellIndex] = {}
+        for state, triggers in (mapping or {}).items():
+            for trigger, intent in triggers.items():
+                self.add_trigger(state, trigger, intent)
+
+    def add_trigger(self, state: str, trigger: str, intent: str) -> None:
+        index = self.indexes.get(state)
+        if index is None:
+            index = self.indexes[state] = SymSpellIndex(self.max_distance)
+        index.add(normalize(trigger), intent.lower())
+
+    async def identify(self, text: str, state: str, intents: List[str]) -> IntentResult:
+        index = self.indexes.get(state)
+        query = normalize(text)
+        if index is not None and query:
+            match = index.lookup(query, len(query) // self.chars_per_edit)
+            if match is not None and match[1] in intents:
+                term, intent, distance = match
+                return intent, 1.0 - distance / max(len(query), len(term))
+        if self.default_intent and self.default_intent in intents:
+            return self.default_intent.lower(), 0.0
+        return None
@@ -1,23 +1,59 @@
 from __future__ import annotations
 
 import asyncio
+import importlib
+import inspect
+import json
 import logging
+import queue
+import random
 import re
-from typing import Dict, List, Optional, Protocol
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Protocol, Tuple, Union
 
-from openai import OpenAI
+from .stats import Reservoir
+
+if TYPE_CHECKING:
+    from .context import ConversationContext
 
 logger = logging.getLogger(__name__)
 
+# identify 的返回值：意图标签 / None，或 (标签, 置信度) 二元组。
+IntentResult = Union[Optional[str], Tuple[Optional[str], float]]
+
 
 class IntentService(Protocol):
-    async def identify(self, text: str, state: str, intents: List[str]) -> Optional[str]:
+    async def identify(self, text: str, state: str, intents: List[str]) -> IntentResult:
         """
         返回意图标签或 None（未知/无法分类）。
+        也可返回 (label, confidence)，confidence 取值 [0, 1]，供级联等调用方使用。
         实现应对不确定性返回 None，而不是抛异常。
+        声明类属性 accepts_context = True 的实现还会收到关键字参数 context（ConversationContext）。
         """
 
 
+def split_intent_result(result: IntentResult) -> Tuple[Optional[str], float]:
+    """
+    将 identify 的返回值统一为 (label, confidence)。
+
+    - 纯标签视为置信度 1.0；None 或空标签视为 (None, 0.0)。
+    - 标签去空白并小写化。
+    """
+    confidence = 1.0
+    if isinstance(result, tuple):
+        result, confidence = result
+    if result is None:
+        return None, 0.0
+    label = result.strip().lower()
+    if not label:
+        return None, 0.0
+    return label, float(confidence)
+
+
 class StubIntentService:
     """
     可配置的确定性意图解析，供测试/离线模式使用。
@@ -45,101 +81,382 @@ class StubIntentService:
         return None
 
 
-class LLMIntentService:
+class UsageMeter:
+    """当前轮次内意图识别消耗的 LLM token 数与调用次数。"""
+
+    __slots__ = ("tokens", "calls")
+
+    def __init__(self) -> None:
+        self.tokens = 0
+        self.calls = 0
+
+
+_CURRENT_METER: ContextVar[Optional[UsageMeter]] = ContextVar("dsl_agent_usage_meter", default=None)
+
+
+@contextmanager
+def metered() -> Iterator[UsageMeter]:
+    """
+    在 with 块内累计 record_usage 上报的用量。
+    上下文变量会随 asyncio 任务与 to_thread 传递，因此后端在线程中上报同样生效。
+    """
+    meter = UsageMeter()
+    token = _CURRENT_METER.set(meter)
+    try:
+        yield meter
+    finally:
+        _CURRENT_METER.reset(token)
+
+
+def record_usage(tokens: int) -> None:
+    """后端上报一次调用的 token 用量；不在 metered() 内时忽略。"""
+    meter = _CURRENT_METER.get()
+    if meter is not None:
+        meter.tokens += tokens
+        meter.calls += 1
+
+
+# 意图后端插件表：name -> "module:attribute"，首次 load_backend 时才导入对应模块
+# （llm、fuzzy 各自成模块；stub、keyword 很轻，留在本模块）
+BACKENDS: Dict[str, str] = {
+    "stub": "dsl_agent.intent_service:StubIntentService",
+    "keyword": "dsl_agent.intent_service:KeywordIntentService",
+    "fuzzy": "dsl_agent.fuzzy:FuzzyStubIntentService",
+    "llm": "dsl_agent.llm:LLMIntentService",
+}
+
+# 迁到 dsl_agent.llm 的名字，仍可从本模块导入（访问时才加载）
+_LLM_EXPORTS = (
+    "LLMIntentService",
+    "DEFAULT_SYSTEM_PROMPT",
+    "DEFAULT_CHOICE_SYSTEM_PROMPT",
+    "CHOICE_LABELS",
+    "SCORING_MODES",
+)
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LLM_EXPORTS:
+        from . import llm
+
+        return getattr(llm, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def register_backend(name: str, target: str) -> None:
+    """注册意图后端插件，target 形如 "package.module:ClassName"。"""
+    if ":" not in target:
+        raise ValueError(f"Backend target must look like 'module:attribute', got '{target}'")
+    BACKENDS[name] = target
+
+
+def load_backend(name: str) -> Any:
+    """按名称导入并返回意图后端类（或工厂）。"""
+    try:
+        target = BACKENDS[name]
+    except KeyError as exc:
+        raise KeyError(f"Unknown intent backend '{name}'") from exc
+    module_name, _, attribute = target.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def load_stub_mapping(path: str) -> Dict[str, Dict[str, str]]:
+    """读取 state -> trigger -> intent 的 JSON 映射；黄金用例文件的 "mapping" 字段同样可用。"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("mapping", data) if isinstance(data, dict) else {}
+
+
+class KeywordIntentService:
+    """
+    基于关键词的轻量本地分类器，作为级联中 LLM 之前的廉价一层。
+
+    keywords: intent -> 关键词列表
+    - 纯 ASCII 关键词按单词边界匹配（"hi" 不命中 "this"），其余（如中文）按子串匹配。
+    - 每个允许意图的得分为文本中命中关键词的总长度。
+    - 返回 (得分最高的意图, 其得分占全部得分的比例)；无命中返回 None。
+    """
+
+    def __init__(self, keywords: Optional[Dict[str, List[str]]] = None) -> None:
+        self.keywords = {
+            intent.lower(): [kw.strip().lower() for kw in words if kw.strip()]
+            for intent, words in (keywords or {}).items()
+        }
+        self._patterns = {
+            kw: re.compile(rf"(?<![a-z0-9_]){re.escape(kw)}(?![a-z0-9_])")
+            for words in self.keywords.values()
+            for kw in words
+            if kw.isascii()
+        }
+
+    def _matches(self, keyword: str, lowered: str) -> bool:
+        pattern = self._patterns.get(keyword)
+        return pattern.search(lowered) is not None if pattern is not None else keyword in lowered
+
+    async def identify(self, text: str, state: str, intents: List[str]) -> IntentResult:
+        lowered = text.strip().lower()
+        scores: Dict[str, int] = {}
+        for intent in intents:
+            score = sum(len(kw) for kw in self.keywords.get(intent, []) if self._matches(kw, lowered))
+            if score:
+                scores[intent] = score
+        if not scores:
+            return None
+        best = max(scores, key=scores.__getitem__)
+        return best, scores[best] / sum(scores.values())
+
+
+@dataclass
+class CascadeTier:
+    """级联中的一层：名称、意图服务与接受阈值。"""
+
+    name: str
+    service: IntentService
+    threshold: float = 0.0
+    calls: int = 0
+    hits: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.calls if self.calls else 0.0
+
+
+class CascadeIntentService:
     """
-    基于 OpenAI 兼容接口的意图分类实现（适配阿里云百炼/通义千问）。
-    增强提示：只输出一个标签；不确定输出 none；附带可选意图描述。
+    由廉价到昂贵依次尝试各层意图服务，首个置信度达到该层阈值的结果即返回。
+
+    - 各层均未达阈值时，返回所有层中置信度最高的候选（可能为 None）。
+    - 每层记录调用数与命中数，通过 stats() 查看命中率。
+    """
+
+    accepts_context = True
+
+    def __init__(self, tiers: List[CascadeTier]) -> None:
+        if not tiers:
+            raise ValueError("CascadeIntentService requires at least one tier")
+        self.tiers = tiers
+        self.requests = 0
+        self.unresolved = 0
+
+    async def identify(
+        self,
+        text: str,
+        state: str,
+        intents: List[str],
+        context: Optional["ConversationContext"] = None,
+    ) -> IntentResult:
+        self.requests += 1
+        best: Tuple[Optional[str], float] = (None, 0.0)
+        for tier in self.tiers:
+            tier.calls += 1
+            result = _identify_with(tier.service, text, state, intents, context)
+            if inspect.isawaitable(result):
+                result = await result
+            label, confidence = split_intent_result(result)
+            if label is not None and label not in intents:
+                label, confidence = None, 0.0
+            if label is not None and confidence >= tier.threshold:
+                tier.hits += 1
+                return label, confidence
+            if label is not None and confidence > best[1]:
+                best = (label, confidence)
+        if best[0] is None:
+            self.unresolved += 1
+            return None
+        return best
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            tier.name: {"calls": tier.calls, "hits": tier.hits, "hit_rate": tier.hit_rate}
+            for tier in self.tiers
+        }
+
+
+def _identify_with(
+    service: IntentService,
+    text: str,
+    state: str,
+    intents: List[str],
+    context: Optional["ConversationContext"],
+) -> Any:
+    if context is not None and getattr(service, "accepts_context", False):
+        return service.identify(text, state, intents, context=context)
+    return service.identify(text, state, intents)
+
+
+def _valid_label(result: IntentResult, intents: List[str]) -> Optional[str]:
+    label, _ = split_intent_result(result)
+    return label if label in intents else None
+
+
+# (text, state, intents, context snapshot, primary label)
+_ShadowJob = Tuple[str, str, List[str], Optional["ConversationContext"], Optional[str]]
+
+
+class ShadowIntentService:
     """
+    影子模式：始终以 primary 的结果应答，同时按 sample_rate 抽样，把同一请求
+    交给后台线程（自带事件循环）上的 candidate，记录一致率与延迟。
+
+    - 投递使用有界队列的 put_nowait，队列满则丢弃并计数，不阻塞也不拖慢主路径。
+    - candidate 的异常与 token 消耗只计入影子统计，不影响会话与主路径的计量。
+    - stats() 汇总抽样/丢弃/完成数、一致率、双方延迟分位数及不一致的标签对；延迟只保留
+      latency_samples 个的蓄水池抽样，长期运行内存不增长。
+    """
+
+    accepts_context = True
 
     def __init__(
         self,
-        api_base: str,
-        api_key: str,
-        model: str,
-        timeout: float = 15.0,
-        max_tokens: int = 8,
-        temperature: float = 0.0,
-        max_retries: int = 1,
-        intent_descriptions: Optional[Dict[str, str]] = None,
-        client: Optional[OpenAI] = None,
+        primary: IntentService,
+        candidate: IntentService,
+        sample_rate: float = 1.0,
+        max_queue: int = 1000,
+        workers: int = 1,
+        seed: Optional[int] = None,
+        latency_samples: int = 4096,
     ) -> None:
-        self.api_base = api_base
-        self.api_key = api_key
-        self.model = model
-        self.timeout = timeout
-        self.max_tokens = max_tokens
-        self.temperature = temperature
-        self.max_retries = max_retries
-        self.intent_descriptions = intent_descriptions or {}
-        self.client = client or OpenAI(api_key=api_key, base_url=api_base)
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be within [0, 1]")
+        self.primary = primary
+        self.candidate = candidate
+        self.sample_rate = sample_rate
+        self.workers = max(1, workers)
+        self._queue: "queue.Queue[_ShadowJob]" = queue.Queue(maxsize=max_queue)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+        self._closed = False
+        self.requests = 0
+        self.sampled = 0
+        self.dropped = 0
+        self.completed = 0
+        self.agreements = 0
+        self.errors = 0
+        self.candidate_tokens = 0
+        # bounded samples: the wrapper stays on live traffic indefinitely
+        self.primary_latencies = Reservoir(latency_samples, random.Random(seed))
+        self.candidate_latencies = Reservoir(latency_samples, random.Random(seed))
+        self.disagreements: Dict[Tuple[str, str], int] = {}
 
-    async def identify(self, text: str, state: str, intents: List[str]) -> Optional[str]:
-        sanitized = text.strip()[:200]
-        prompt = self._build_prompt(state, intents, sanitized)
-        content = await asyncio.to_thread(self._call_llm, prompt)
-        if content is None:
-            return None
-        return self._normalize_result(content, intents)
-
-    def _call_llm(self, prompt: str) -> Optional[str]:
-        last_exc: Optional[Exception] = None
-        for attempt in range(self.max_retries):
-            try:
-                completion = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": (
-                                "You are an intent classifier. "
-                                "Pick exactly one label from the allowed list. "
-                                "If unsure, answer 'none'. "
-                                "Do not add punctuation or explanation."
-                            ),
-                        },
-                        {"role": "user", "content": prompt},
-                    ],
-                    max_tokens=self.max_tokens,
-                    temperature=self.temperature,
-                    timeout=self.timeout,
-                )
-                return completion.choices[0].message.content
-            except Exception as exc:  # pragma: no cover - network errors vary
-                last_exc = exc
-                logger.warning("LLM intent call failed (attempt %s): %s", attempt + 1, exc)
-        if last_exc:
-            logger.error("LLM intent call failed after retries: %s", last_exc)
-        return None
+    async def identify(
+        self,
+        text: str,
+        state: str,
+        intents: List[str],
+        context: Optional["ConversationContext"] = None,
+    ) -> IntentResult:
+        started = time.perf_counter()
+        result = _identify_with(self.primary, text, state, intents, context)
+        if inspect.isawaitable(result):
+            result = await result
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.requests += 1
+            self.primary_latencies.add(elapsed)
+        if self.sample_rate >= 1.0 or self._random.random() < self.sample_rate:
+            snapshot = context.snapshot() if context is not None else None
+            self._submit((text, state, list(intents), snapshot, _valid_label(result, intents)))
+        return result
 
-    def _build_prompt(self, state: str, intents: List[str], text: str) -> str:
-        # 构造带描述的意图列表
-        parts = []
-        for intent in intents:
-            desc = self.intent_descriptions.get(intent, "")
-            if desc:
-                parts.append(f"{intent}: {desc}")
+    def _submit(self, job: _ShadowJob) -> None:
+        if self._closed:
+            return
+        if not self._threads:
+            self._start()
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return
+        with self._lock:
+            self.sampled += 1
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            for n in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"intent-shadow-{n}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker(self) -> None:
+        loop = asyncio.new_event_loop()
+        try:
+            while True:
+                try:
+                    job = self._queue.get(timeout=0.1)
+                except queue.Empty:
+                    if self._closed:
+                        return
+                    continue
+                try:
+                    if not self._stopping.is_set():
+                        self._run(loop, job)
+                finally:
+                    self._queue.task_done()
+        finally:
+            loop.close()
+
+    def _run(self, loop: asyncio.AbstractEventLoop, job: _ShadowJob) -> None:
+        text, state, intents, context, expected = job
+        started = time.perf_counter()
+        try:
+            with metered() as meter:
+                result = _identify_with(self.candidate, text, state, intents, context)
+                if inspect.isawaitable(result):
+                    result = loop.run_until_complete(result)
+        except Exception as exc:  # a failing candidate must never surface to the session
+            logger.info("Shadow intent service failed: %s", exc)
+            with self._lock:
+                self.errors += 1
+            return
+        elapsed = time.perf_counter() - started
+        label = _valid_label(result, intents)
+        with self._lock:
+            self.completed += 1
+            self.candidate_latencies.add(elapsed)
+            self.candidate_tokens += meter.tokens
+            if label == expected:
+                self.agreements += 1
             else:
-                parts.append(intent)
-        intent_list = "; ".join(parts)
-        return (
-            f"Current state: {state}. Allowed intents: [{intent_list}]. "
-            f"User said: \"{text}\". Respond with exactly one intent label from the allowed intents, "
-            f"or 'none' if you are not sure."
-        )
-
-    def _normalize_result(self, content: str, intents: List[str]) -> Optional[str]:
-        if content is None:
-            return None
-        normalized = content.strip().lower()
-        if normalized == "none":
-            return None
-        if normalized in intents:
-            return normalized
-        # 只取第一个由字母数字下划线组成的 token
-        tokens = re.findall(r"[a-z0-9_]+", normalized)
-        if not tokens:
-            return None
-        first = tokens[0]
-        if first in intents:
-            return first
-        return None
+                key = (expected or "none", label or "none")
+                self.disagreements[key] = self.disagreements.get(key, 0) + 1
+
+    def flush(self) -> None:
+        """Block until every queued comparison has run (for tests and shutdown)."""
+        self._queue.join()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop sampling and shut the workers down. Queued comparisons get up to
+        ``timeout`` seconds (None = no limit) to finish; the rest are discarded.
+        """
+        self._closed = True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        if any(thread.is_alive() for thread in self._threads):
+            self._stopping.set()
+        self._threads = []
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            primary = self.primary_latencies.summary()
+            candidate = self.candidate_latencies.summary()
+            return {
+                "requests": self.requests,
+                "sampled": self.sampled,
+                "dropped": self.dropped,
+                "completed": self.completed,
+                "errors": self.errors,
+                "agreements": self.agreements,
+                "agreement_rate": self.agreements / self.completed if self.completed else 0.0,
+                "primary_ms": {k: (v * 1000 if k != "count" else v) for k, v in primary.items()},
+                "candidate_ms": {k: (v * 1000 if k != "count" else v) for k, v in candidate.items()},
+                "candidate_tokens": self.candidate_tokens,
+                "disagreements": {f"{a}->{b}": n for (a, b), n in sorted(self.disagreements.items())},
+            }
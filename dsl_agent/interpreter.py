@@ -3,21 +3,51 @@ from __future__ import annotations
 import asyncio
 import inspect
 import logging
-from typing import List, Optional
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
 
-from .intent_service import IntentService
+from .context import ConversationContext
+from .intent_service import IntentService, metered, split_intent_result
 from .model import Scenario, State, Transition
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class TurnEvent:
+    """One processed turn, as delivered to interpreter listeners."""
+
+    state: str
+    intent: str  # matched intent or "default"
+    next_state: Optional[str]  # None means end
+    ended: bool
+    classify_seconds: float
+    tokens: int
+
+
+TurnListener = Callable[[TurnEvent], None]
+
+
 class Interpreter:
-    def __init__(self, scenario: Scenario, intent_service: IntentService):
+    def __init__(
+        self,
+        scenario: Scenario,
+        intent_service: IntentService,
+        listeners: Optional[List[TurnListener]] = None,
+        context_turns: int = 0,
+    ):
         self.scenario = scenario
         self.intent_service = intent_service
+        self.listeners: List[TurnListener] = list(listeners or [])
+        # 最近 K 轮上下文，仅在意图服务声明 accepts_context 时传入
+        self.context: Optional[ConversationContext] = ConversationContext(context_turns) if context_turns > 0 else None
         self._current_state = scenario.initial_state
         self._ended = False
 
+    def add_listener(self, listener: TurnListener) -> None:
+        self.listeners.append(listener)
+
     @property
     def current_state(self) -> str:
         return self._current_state
@@ -29,30 +59,52 @@ class Interpreter:
     def reset(self) -> None:
         self._current_state = self.scenario.initial_state
         self._ended = False
+        if self.context is not None:
+            self.context.clear()
 
     def process_input(self, user_text: str) -> str:
-        if self._ended:
-            raise RuntimeError("Conversation already ended")
+        state = self._begin_turn()
+        started = time.perf_counter()
+        with metered() as meter:
+            intent = self._resolve_intent(user_text, state.name, list(state.intents))
+        return self._apply(state, intent, user_text, time.perf_counter() - started, meter.tokens)
 
-        state = self.scenario.get_state(self._current_state)
-        available_intents: List[str] = list(state.intents.keys())
-        intent = self._resolve_intent(user_text, state.name, available_intents)
-        transition: Transition
+    async def process_input_async(self, user_text: str) -> str:
+        """
+        与 process_input 相同，但在已运行的事件循环中等待意图识别。
+        识别完成前状态不变，因此可安全取消。
+        """
+        state = self._begin_turn()
+        started = time.perf_counter()
+        with metered() as meter:
+            intent = await self._resolve_intent_async(user_text, state.name, list(state.intents))
+        return self._apply(state, intent, user_text, time.perf_counter() - started, meter.tokens)
 
-        if intent and intent in state.intents:
-            transition = state.intents[intent]
-            matched = intent
-        else:
-            transition = state.default
-            matched = "default"
+    def trigger_default(self) -> str:
+        """
+        不经意图识别直接走当前状态的 default 规则（空闲超时使用），
+        {user_input} 替换为空串。
+        """
+        return self._apply(self._begin_turn(), None, "")
 
-        reply = transition.response.replace("{user_input}", user_text)
+    def _begin_turn(self) -> State:
+        if self._ended:
+            raise RuntimeError("Conversation already ended")
+        return self.scenario.get_state(self._current_state)
 
-        if transition.next_state is None:
+    def _apply(
+        self,
+        state: State,
+        intent: Optional[str],
+        user_text: str,
+        classify_seconds: float = 0.0,
+        tokens: int = 0,
+    ) -> str:
+        reply, next_state, matched = self._route(state, intent, user_text)
+
+        if next_state is None:
             self._ended = True
-            next_state = None
         else:
-            next_state = transition.next_state
             self._current_state = next_state
 
         logger.info(
@@ -62,15 +114,40 @@ class Interpreter:
             next_state if next_state is not None else "end",
             self._ended,
         )
+        if self.context is not None:
+            self.context.append(user_text, matched, state.name)
+        if self.listeners:
+            event = TurnEvent(state.name, matched, next_state, self._ended, classify_seconds, tokens)
+            for listener in self.listeners:
+                listener(event)
         return reply
 
+    def _route(self, state: State, intent: Optional[str], user_text: str) -> Tuple[str, Optional[str], str]:
+        """选出转移，返回 (回复, 下一状态或 None, 命中的意图或 "default")。"""
+        transition: Transition
+        if intent and intent in state.intents:
+            transition = state.intents[intent]
+            matched = intent
+        else:
+            transition = state.default
+            matched = "default"
+        return transition.response.replace("{user_input}", user_text), transition.next_state, matched
+
+    def _identify(self, user_text: str, state: str, intents: List[str]) -> object:
+        if self.context is not None and len(self.context) and getattr(self.intent_service, "accepts_context", False):
+            return self.intent_service.identify(user_text, state, intents, context=self.context)
+        return self.intent_service.identify(user_text, state, intents)
+
     def _resolve_intent(self, user_text: str, state: str, intents: List[str]) -> Optional[str]:
-        result = self.intent_service.identify(user_text, state, intents)
+        result = self._identify(user_text, state, intents)
         if inspect.isawaitable(result):
             result = asyncio.run(result)
-        if result is None:
-            return None
-        normalized = result.strip().lower()
-        if not normalized:
-            return None
-        return normalized
+        label, _ = split_intent_result(result)
+        return label
+
+    async def _resolve_intent_async(self, user_text: str, state: str, intents: List[str]) -> Optional[str]:
+        result = self._identify(user_text, state, intents)
+        if inspect.isawaitable(result):
+            result = await result
+        label, _ = split_intent_result(result)
+        return label
@@ -0,0 +1,271 @@
+"""
+OpenAI 兼容接口的 LLM 意图后端。
+
+单独成模块以便按需导入：只用 stub/关键词后端或仅做 --check 时，既不加载本模块，
+也不导入 openai SDK（SDK 在首次创建客户端时才导入）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import re
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
+
+from .intent_service import IntentResult, record_usage
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+    from .context import ConversationContext
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_SYSTEM_PROMPT = (
+    "You are an intent classifier. "
+    "Pick exactly one label from the allowed list. "
+    "If unsure, answer 'none'. "
+    "Do not add punctuation or explanation."
+)
+
+# logprobs 模式的系统提示：用户提示给出带字母的选项，只回答一个字母
+DEFAULT_CHOICE_SYSTEM_PROMPT = (
+    "You are an intent classifier. "
+    "The options are labeled with single letters; one of them stands for none. "
+    "Answer with exactly one option letter and nothing else."
+)
+
+
+# logprobs 模式下的单 token 选项标签；最后一个选项固定为 none
+CHOICE_LABELS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+SCORING_MODES = ("generate", "logprobs")
+
+
+class LLMIntentService:
+    """
+    基于 OpenAI 兼容接口的意图分类实现（适配阿里云百炼/通义千问）。
+    增强提示：只输出一个标签；不确定输出 none；附带可选意图描述与最近几轮对话摘要。
+
+    scoring="logprobs" 时，每个意图（以及 none）对应一个字母选项，只请求 1 个 token
+    并取 top_logprobs，对选项字母的 logprob 除以 logprob_temperature 后做 softmax，
+    返回 (意图, 置信度)，不再解析自由文本。该置信度只是温度缩放后的 softmax，未经
+    标定；需要概率意义时应先在标注数据上拟合温度。此模式使用要求只答字母的
+    choice_system_prompt（可覆盖，同 system_prompt）；服务端不返回 logprobs 时，只有
+    整段输出恰为一个选项字母才被采纳。提供 label_token_ids（字母 -> 该模型分词器的
+    token id）时另外用 logit_bias 把输出限制在选项内。意图数超过可用选项字母数时退回
+    生成模式，并对每个状态记录一次警告。
+    """
+
+    accepts_context = True
+
+    def __init__(
+        self,
+        api_base: str,
+        api_key: str,
+        model: str,
+        timeout: float = 15.0,
+        max_tokens: int = 8,
+        temperature: float = 0.0,
+        max_retries: int = 1,
+        intent_descriptions: Optional[Dict[str, str]] = None,
+        client: Optional["OpenAI"] = None,
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+        scoring: str = "generate",
+        label_token_ids: Optional[Dict[str, int]] = None,
+        logprob_temperature: float = 1.0,
+        choice_system_prompt: str = DEFAULT_CHOICE_SYSTEM_PROMPT,
+    ) -> None:
+        if scoring not in SCORING_MODES:
+            raise ValueError(f"Unknown scoring mode '{scoring}' (expected one of {', '.join(SCORING_MODES)})")
+        if logprob_temperature <= 0:
+            raise ValueError("logprob_temperature must be > 0")
+        self.api_base = api_base
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.max_retries = max_retries
+        self.intent_descriptions = intent_descriptions or {}
+        self.system_prompt = system_prompt
+        self.choice_system_prompt = choice_system_prompt
+        self.scoring = scoring
+        self.label_token_ids = label_token_ids or {}
+        self.logprob_temperature = logprob_temperature
+        self._client = client
+        self._client_lock = threading.Lock()
+        self._free_text_states: Set[str] = set()
+
+    @property
+    def client(self) -> "OpenAI":
+        """OpenAI 客户端，首次访问时才导入 SDK 并创建。"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import OpenAI
+
+                    self._client = OpenAI(api_key=self.api_key, base_url=self.api_base)
+        return self._client
+
+    def warm_up(self) -> threading.Thread:
+        """
+        后台线程预先导入 SDK 并建立到 api_base 的连接，缩短首轮识别延迟。
+        失败只记录日志。
+        """
+
+        def _run() -> None:
+            try:
+                self.client.with_options(timeout=self.timeout, max_retries=0).models.list()
+                logger.info("LLM endpoint warm-up done api_base=%s", self.api_base)
+            except Exception as exc:  # pragma: no cover - network errors vary
+                logger.info("LLM endpoint warm-up failed: %s", exc)
+
+        thread = threading.Thread(target=_run, name="llm-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    async def identify(
+        self,
+        text: str,
+        state: str,
+        intents: List[str],
+        context: Optional["ConversationContext"] = None,
+    ) -> IntentResult:
+        sanitized = text.strip()[:200]
+        history = context.summary() if context else ""
+        if self.scoring == "logprobs":
+            if len(intents) < len(CHOICE_LABELS):
+                return await asyncio.to_thread(self._score_choices, state, intents, sanitized, history)
+            if state not in self._free_text_states:
+                self._free_text_states.add(state)
+                logger.warning(
+                    "State %s has %d intents, more than logprobs scoring supports (%d); using free-text generation",
+                    state,
+                    len(intents),
+                    len(CHOICE_LABELS) - 1,
+                )
+        prompt = self._build_prompt(state, intents, sanitized, history)
+        content = await asyncio.to_thread(self._call_llm, prompt)
+        if content is None:
+            return None
+        return self._normalize_result(content, intents)
+
+    def _create(self, prompt: str, max_tokens: int, system_prompt: Optional[str] = None, **extra: Any) -> Any:
+        """带重试的 chat.completions 调用；system_prompt 缺省用 self.system_prompt。全部失败时返回 None。"""
+        last_exc: Optional[Exception] = None
+        for attempt in range(self.max_retries):
+            try:
+                completion = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt or self.system_prompt},
+                        {"role": "user", "content": prompt},
+                    ],
+                    max_tokens=max_tokens,
+                    temperature=self.temperature,
+                    timeout=self.timeout,
+                    **extra,
+                )
+                usage = getattr(completion, "usage", None)
+                record_usage(getattr(usage, "total_tokens", None) or 0)
+                return completion
+            except Exception as exc:  # pragma: no cover - network errors vary
+                last_exc = exc
+                logger.warning("LLM intent call failed (attempt %s): %s", attempt + 1, exc)
+        if last_exc:
+            logger.error("LLM intent call failed after retries: %s", last_exc)
+        return None
+
+    def _call_llm(self, prompt: str) -> Optional[str]:
+        completion = self._create(prompt, self.max_tokens)
+        return completion.choices[0].message.content if completion is not None else None
+
+    def _score_choices(self, state: str, intents: List[str], text: str, history: str = "") -> IntentResult:
+        labels = CHOICE_LABELS[: len(intents) + 1]  # 最后一个字母表示 none
+        extra: Dict[str, Any] = {"logprobs": True, "top_logprobs": min(len(labels), 20)}
+        bias = {str(self.label_token_ids[label]): 100 for label in labels if label in self.label_token_ids}
+        if bias:
+            extra["logit_bias"] = bias
+        prompt = self._build_choice_prompt(state, intents, text, history)
+        completion = self._create(prompt, 1, self.choice_system_prompt, **extra)
+        if completion is None:
+            return None
+        choice = completion.choices[0]
+        scores = _label_logprobs(choice, labels)
+        if not scores:
+            # 服务端未返回 logprobs：整段输出恰为一个选项字母时才采用，视为完全确定
+            token = (choice.message.content or "").strip().upper()
+            if len(token) != 1 or token not in labels:
+                return None
+            scores = {token: 0.0}
+        best = max(scores, key=scores.__getitem__)
+        peak = scores[best]
+        total = sum(math.exp((lp - peak) / self.logprob_temperature) for lp in scores.values())
+        index = labels.index(best)
+        if index == len(intents):
+            return None
+        return intents[index], 1.0 / total
+
+    def _build_choice_prompt(self, state: str, intents: List[str], text: str, history: str = "") -> str:
+        options = []
+        for label, intent in zip(CHOICE_LABELS, [*intents, "none"]):
+            desc = self.intent_descriptions.get(intent, "")
+            options.append(f"{label}={intent}: {desc}" if desc else f"{label}={intent}")
+        recent = f"Recent turns (oldest first, state/intent: utterance): {history}. " if history else ""
+        return (
+            f"{recent}Current state: {state}. Allowed intents: [{'; '.join(options)}]. "
+            f"User said: \"{text}\". Respond with only the letter of the best matching intent, "
+            f"or the letter of none if you are not sure."
+        )
+
+    def _build_prompt(self, state: str, intents: List[str], text: str, history: str = "") -> str:
+        # 构造带描述的意图列表
+        parts = []
+        for intent in intents:
+            desc = self.intent_descriptions.get(intent, "")
+            if desc:
+                parts.append(f"{intent}: {desc}")
+            else:
+                parts.append(intent)
+        intent_list = "; ".join(parts)
+        recent = f"Recent turns (oldest first, state/intent: utterance): {history}. " if history else ""
+        return (
+            f"{recent}Current state: {state}. Allowed intents: [{intent_list}]. "
+            f"User said: \"{text}\". Respond with exactly one intent label from the allowed intents, "
+            f"or 'none' if you are not sure."
+        )
+
+    def _normalize_result(self, content: str, intents: List[str]) -> Optional[str]:
+        if content is None:
+            return None
+        normalized = content.strip().lower()
+        if normalized == "none":
+            return None
+        if normalized in intents:
+            return normalized
+        # 只取第一个由字母数字下划线组成的 token
+        tokens = re.findall(r"[a-z0-9_]+", normalized)
+        if not tokens:
+            return None
+        first = tokens[0]
+        if first in intents:
+            return first
+        return None
+
+
+def _label_logprobs(choice: Any, labels: str) -> Dict[str, float]:
+    """Label letter -> logprob from the first generated token and its top_logprobs."""
+    content = getattr(getattr(choice, "logprobs", None), "content", None) or []
+    if not content:
+        return {}
+    first = content[0]
+    scores: Dict[str, float] = {}
+    for item in [first, *(getattr(first, "top_logprobs", None) or [])]:
+        token = (getattr(item, "token", "") or "").strip().upper()
+        logprob = float(getattr(item, "logprob", float("-inf")))
+        if len(token) == 1 and token in labels and token not in scores and math.isfinite(logprob):
+            scores[token] = logprob
+    return scores
@@ -0,0 +1,375 @@
+"""
+Scenario-driven synthetic load generator.
+
+Virtual users perform weighted random walks over a scenario's transition
+graph: at each state they pick an intent (or the default), send an
+utterance that maps to it (the intent label itself unless utterances are
+given), follow whatever state the target reports, wait a think time, and
+start a new conversation once the current one ends. Turn latency,
+throughput, errors and memory are sampled for the whole run.
+
+An out-of-process ``--target-cmd`` worker must classify those utterances
+itself, e.g. an LLM backend pointed at ``dsl_agent.fake_llm`` (which echoes
+intent labels) or a keyword cascade.
+
+    python -m dsl_agent.loadgen tests/data/travel_bot.dsl --sessions 100 --duration 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import array
+import asyncio
+import itertools
+import json
+import os
+import random
+import shlex
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Protocol, Set, Tuple
+
+from . import parser as dsl_parser
+from .intent_service import IntentService, StubIntentService
+from .interpreter import Interpreter
+from .model import Scenario, State
+from .profiler import FlowProfiler
+from .stats import rss_bytes, summarize
+
+# sent when the walk picks the default rule; never mapped to an intent
+DEFAULT_UTTERANCE = "<unrecognized>"
+
+
+class RandomWalker:
+    """
+    Chooses the next intent at a state; None means "take the default rule".
+
+    Intents are weighted by ``weights`` (intent -> weight, default 1.0) and
+    the default rule by ``default_weight``.
+    """
+
+    def __init__(
+        self,
+        scenario: Scenario,
+        rng: random.Random,
+        default_weight: float = 0.2,
+        weights: Optional[Dict[str, float]] = None,
+        utterances: Optional[Dict[str, List[str]]] = None,
+    ) -> None:
+        self.scenario = scenario
+        self.rng = rng
+        self.default_weight = default_weight
+        self.weights = weights or {}
+        self.utterances = utterances or {}
+        self._choices: Dict[str, Tuple[List[Optional[str]], List[float]]] = {}
+
+    def choose(self, state: State) -> Optional[str]:
+        cached = self._choices.get(state.name)
+        if cached is None:
+            options: List[Optional[str]] = list(state.intents)
+            weights = [self.weights.get(intent, 1.0) for intent in state.intents]
+            if self.default_weight > 0 or not options:
+                options.append(None)
+                weights.append(max(self.default_weight, 1e-9))
+            cached = self._choices[state.name] = (options, weights)
+        options, weights = cached
+        return self.rng.choices(options, weights)[0]
+
+    def utterance(self, intent: Optional[str]) -> str:
+        if intent is None:
+            return DEFAULT_UTTERANCE
+        candidates = self.utterances.get(intent)
+        return self.rng.choice(candidates) if candidates else intent
+
+    def stub_mapping(self) -> Dict[str, Dict[str, str]]:
+        """StubIntentService mapping that classifies every generated utterance correctly."""
+        mapping: Dict[str, Dict[str, str]] = {}
+        for state in self.scenario.states.values():
+            triggers: Dict[str, str] = {}
+            for intent in state.intents:
+                for text in self.utterances.get(intent) or [intent]:
+                    triggers[text] = intent
+            mapping[state.name] = triggers
+        return mapping
+
+
+class LoadTarget(Protocol):
+    async def turn(self, session: str, text: str) -> Tuple[str, str, bool]:
+        """Send one utterance; return (reply, current_state, ended)."""
+
+    async def close_session(self, session: str) -> None:
+        ...
+
+    def pid(self) -> Optional[int]:
+        """Process whose memory is sampled (None = this process)."""
+
+
+class InterpreterTarget:
+    """In-process target: one Interpreter per session sharing one intent service."""
+
+    def __init__(
+        self,
+        scenario: Scenario,
+        intent_service: IntentService,
+        on_session: Optional[Callable[[Interpreter], None]] = None,
+    ) -> None:
+        self.scenario = scenario
+        self.intent_service = intent_service
+        self.on_session = on_session
+        self.sessions: Dict[str, Interpreter] = {}
+
+    async def turn(self, session: str, text: str) -> Tuple[str, str, bool]:
+        bot = self.sessions.get(session)
+        if bot is None:
+            bot = self.sessions[session] = Interpreter(self.scenario, self.intent_service)
+            if self.on_session is not None:
+                self.on_session(bot)
+        reply = await bot.process_input_async(text)
+        return reply, bot.current_state, bot.ended
+
+    async def close_session(self, session: str) -> None:
+        self.sessions.pop(session, None)
+
+    def pid(self) -> Optional[int]:
+        return None
+
+
+class BatchProcessTarget:
+    """
+    Out-of-process target: a ``main.py ... --batch`` worker spoken to over JSONL.
+
+    Replies are matched to requests by the ``seq`` the worker assigns in input order.
+    Conversations the generator abandons are closed with a close record, so the
+    worker's memory figures reflect live sessions only.
+    The worker flushes its replies itself; ``PYTHONUNBUFFERED`` is set as well so
+    a Python worker that buffers its stdout cannot deadlock the run.
+    """
+
+    def __init__(self, command: List[str]) -> None:
+        self.command = command
+        self._proc: Optional[asyncio.subprocess.Process] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._seq = itertools.count()
+        self._reader: Optional[asyncio.Task] = None
+        self._open: Set[str] = set()  # sessions the worker may still hold
+
+    async def start(self) -> None:
+        self._proc = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            env=dict(os.environ, PYTHONUNBUFFERED="1"),
+            limit=1 << 20,
+        )
+        self._reader = asyncio.create_task(self._read_replies())
+
+    async def _read_replies(self) -> None:
+        assert self._proc is not None and self._proc.stdout is not None
+        async for raw in self._proc.stdout:
+            record = json.loads(raw)
+            future = self._pending.pop(record.get("seq"), None)
+            if future is not None and not future.done():
+                future.set_result(record)
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(RuntimeError("batch worker exited"))
+
+    async def _send(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        assert self._proc is not None and self._proc.stdin is not None
+        seq = next(self._seq)
+        future = self._pending[seq] = asyncio.get_running_loop().create_future()
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        self._proc.stdin.write(line.encode("utf-8"))
+        await self._proc.stdin.drain()
+        return await future
+
+    async def turn(self, session: str, text: str) -> Tuple[str, str, bool]:
+        self._open.add(session)
+        record = await self._send({"session": session, "text": text})
+        if "error" in record:
+            raise RuntimeError(record["error"])
+        if record["ended"]:
+            self._open.discard(session)  # the worker drops ended sessions itself
+        return record["reply"], record["state"], record["ended"]
+
+    async def close_session(self, session: str) -> None:
+        # abandoned conversations (deadline, max_turns, errors) would otherwise stay in the worker
+        if session in self._open:
+            self._open.discard(session)
+            await self._send({"session": session, "close": True})
+
+    def pid(self) -> Optional[int]:
+        return self._proc.pid if self._proc is not None else None
+
+    async def stop(self) -> None:
+        if self._proc is None:
+            return
+        if self._proc.stdin is not None:
+            self._proc.stdin.close()
+        await self._proc.wait()
+        if self._reader is not None:
+            await self._reader
+
+
+class LoadGenerator:
+    """Runs ``sessions`` concurrent virtual users against a target for ``duration`` seconds."""
+
+    def __init__(
+        self,
+        scenario: Scenario,
+        target: LoadTarget,
+        walker: RandomWalker,
+        sessions: int = 10,
+        duration: float = 10.0,
+        think_time: float = 0.0,
+        max_turns: int = 50,
+        sample_interval: float = 1.0,
+    ) -> None:
+        self.scenario = scenario
+        self.target = target
+        self.walker = walker
+        self.sessions = sessions
+        self.duration = duration
+        self.think_time = think_time
+        self.max_turns = max_turns
+        self.sample_interval = sample_interval
+        self.latencies = array.array("d")  # compact: a float list would skew memory growth
+        self.errors = 0
+        self.conversations = 0
+        self.memory: List[Tuple[float, int]] = []
+        self._conversation_ids = itertools.count()
+
+    async def run(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        deadline = started + self.duration
+        self.memory.append((0.0, rss_bytes(self.target.pid())))
+        sampler = asyncio.create_task(self._sample_memory(started))
+        await asyncio.gather(*(self._user(deadline) for _ in range(self.sessions)))
+        sampler.cancel()
+        elapsed = time.perf_counter() - started
+        self.memory.append((elapsed, rss_bytes(self.target.pid())))
+        return self.report(elapsed)
+
+    async def _user(self, deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            session = f"vu-{next(self._conversation_ids)}"
+            state_name = self.scenario.initial_state
+            for _ in range(self.max_turns):
+                intent = self.walker.choose(self.scenario.states[state_name])
+                text = self.walker.utterance(intent)
+                turn_started = time.perf_counter()
+                try:
+                    _, state_name, ended = await self.target.turn(session, text)
+                except Exception:
+                    self.errors += 1
+                    break
+                self.latencies.append(time.perf_counter() - turn_started)
+                if ended:
+                    self.conversations += 1
+                    break
+                # sleep(0) still yields so in-process users interleave
+                await asyncio.sleep(self.walker.rng.expovariate(1 / self.think_time) if self.think_time > 0 else 0)
+                if time.perf_counter() >= deadline:
+                    break
+            await self.target.close_session(session)
+
+    async def _sample_memory(self, started: float) -> None:
+        while True:
+            await asyncio.sleep(self.sample_interval)
+            self.memory.append((time.perf_counter() - started, rss_bytes(self.target.pid())))
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        turns = len(self.latencies)
+        latency = {key: (value * 1000 if key != "count" else value) for key, value in summarize(self.latencies).items()}
+        attempts = turns + self.errors
+        return {
+            "scenario": self.scenario.name,
+            "sessions": self.sessions,
+            "elapsed_s": elapsed,
+            "turns": turns,
+            "conversations": self.conversations,
+            "throughput_tps": turns / elapsed if elapsed > 0 else 0.0,
+            "latency_ms": latency,
+            "errors": self.errors,
+            "error_rate": self.errors / attempts if attempts else 0.0,
+            "memory_rss_bytes": [[round(t, 3), rss] for t, rss in self.memory],
+            "memory_growth_bytes": self.memory[-1][1] - self.memory[0][1] if self.memory else 0,
+        }
+
+
+def _format_report(report: Dict[str, Any]) -> str:
+    latency = report["latency_ms"]
+    return (
+        f"[{report['scenario']}] sessions={report['sessions']} turns={report['turns']} "
+        f"conversations={report['conversations']} throughput={report['throughput_tps']:.1f}/s\n"
+        f"latency ms: p50={latency['p50']:.3f} p95={latency['p95']:.3f} p99={latency['p99']:.3f} "
+        f"max={latency['max']:.3f}\n"
+        f"errors={report['errors']} ({report['error_rate']:.2%}) "
+        f"memory growth={report['memory_growth_bytes'] / 1024:.0f} KiB"
+    )
+
+
+async def _main(args: argparse.Namespace) -> Dict[str, Any]:
+    scenario = dsl_parser.parse_script(args.script)
+    walker = RandomWalker(scenario, random.Random(args.seed), default_weight=args.default_weight)
+    profiler = FlowProfiler(scenario) if args.profile_flow else None
+    target: Any
+    if args.target_cmd:
+        target = BatchProcessTarget(shlex.split(args.target_cmd))
+        await target.start()
+    else:
+        target = InterpreterTarget(
+            scenario,
+            StubIntentService(mapping=walker.stub_mapping()),
+            on_session=profiler.attach if profiler else None,
+        )
+    generator = LoadGenerator(
+        scenario,
+        target,
+        walker,
+        sessions=args.sessions,
+        duration=args.duration,
+        think_time=args.think_time,
+        max_turns=args.max_turns,
+        sample_interval=args.sample_interval,
+    )
+    try:
+        return await generator.run()
+    finally:
+        if isinstance(target, BatchProcessTarget):
+            await target.stop()
+        if profiler is not None:
+            profiler.write(args.profile_flow)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Scenario-driven load generator")
+    parser.add_argument("script", help="Path to DSL script file")
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=10.0, help="Run time in seconds")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean think time between turns (s)")
+    parser.add_argument("--default-weight", type=float, default=0.2, help="Weight of the default rule per state")
+    parser.add_argument("--max-turns", type=int, default=50, help="Turn cap per conversation")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="Memory sampling interval (s)")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    parser.add_argument(
+        "--target-cmd",
+        help="Drive a batch worker instead of an in-process interpreter, "
+        "e.g. 'python main.py bot.dsl --use-stub --batch'",
+    )
+    parser.add_argument(
+        "--profile-flow",
+        help="Write per-state flow profile JSON here (plus .dot/.folded); in-process target only",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(_main(args))
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(_format_report(report))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -4,21 +4,22 @@ from dataclasses import dataclass, field
 from typing import Dict, Optional
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Transition:
-    """Represents a reply and next action."""
+    """Represents a reply and next action. Immutable, so equal transitions can be shared."""
 
     response: str
     next_state: Optional[str]  # None means end
 
 
-@dataclass
+@dataclass(slots=True)
 class State:
     """Represents a conversation state and its intent routing."""
 
     name: str
     intents: Dict[str, Transition] = field(default_factory=dict)
     default: Transition = None  # type: ignore[assignment]
+    timeout: Optional[float] = None  # idle seconds before default fires; None = session default, 0 = never
 
     def set_default(self, transition: Transition) -> None:
         if self.default is not None:
@@ -26,7 +27,7 @@ class State:
         self.default = transition
 
 
-@dataclass
+@dataclass(slots=True)
 class Scenario:
     """Top-level scenario parsed from a DSL script."""
 
@@ -1,14 +1,50 @@
 from __future__ import annotations
 
+import hashlib
 import re
+import sys
 from dataclasses import dataclass
-from typing import Dict, Iterable, Iterator, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 from .model import Scenario, State, Transition
 
 ID_PATTERN = re.compile(r"[a-z][a-z0-9_]*")
 
 
+class TransitionPool:
+    """
+    Parse-time dedup table: identical rules share one immutable Transition and
+    identical replies one string. Pass the same pool to several parsers to
+    share them across scenarios.
+    """
+
+    __slots__ = ("transitions", "responses")
+
+    def __init__(self) -> None:
+        self.transitions: Dict[Tuple[str, Optional[str]], Transition] = {}
+        self.responses: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.transitions)
+
+    def get(self, response: str, next_state: Optional[str]) -> Transition:
+        key = (response, next_state)
+        transition = self.transitions.get(key)
+        if transition is None:
+            response = self.responses.setdefault(response, response)
+            transition = self.transitions[key] = Transition(response=response, next_state=next_state)
+        return transition
+
+    def retain(self, states: Iterable[State]) -> None:
+        """Drop entries no longer referenced by ``states``."""
+        keep: Dict[Tuple[str, Optional[str]], Transition] = {}
+        for state in states:
+            for transition in (*state.intents.values(), state.default):
+                keep[(transition.response, transition.next_state)] = transition
+        self.transitions = keep
+        self.responses = {response: response for response, _ in keep}
+
+
 class ParseError(Exception):
     def __init__(self, message: str, line: Optional[int] = None, column: Optional[int] = None):
         self.line = line
@@ -77,6 +113,9 @@ class Lexer:
             if ch.isalpha():
                 yield self._identifier()
                 continue
+            if ch.isdigit():
+                yield self._number()
+                continue
             raise ParseError(f"Unexpected character '{ch}'", self.line, self.col)
         yield Token("EOF", "", self.line, self.col)
 
@@ -102,8 +141,20 @@ class Lexer:
         if lower_value in KEYWORDS and value != lower_value:
             raise ParseError("Keywords must be lowercase", start_line, start_col)
         token_type = KEYWORDS.get(lower_value, "ID")
+        if token_type == "ID":
+            value = sys.intern(value)
         return Token(token_type, value, start_line, start_col)
 
+    def _number(self) -> Token:
+        start_pos, start_line, start_col = self.pos, self.line, self.col
+        while self.pos < self.length and self.text[self.pos].isdigit():
+            self._advance(1)
+        if self.text.startswith(".", self.pos) and self.pos + 1 < self.length and self.text[self.pos + 1].isdigit():
+            self._advance(1)
+            while self.pos < self.length and self.text[self.pos].isdigit():
+                self._advance(1)
+        return Token("NUMBER", self.text[start_pos:self.pos], start_line, start_col)
+
     def _string(self) -> Token:
         start_line, start_col = self.line, self.col
         self._advance(1)  # skip opening quote
@@ -128,10 +179,11 @@ class Lexer:
 
 
 class Parser:
-    def __init__(self, tokens: Iterable[Token]):
+    def __init__(self, tokens: Iterable[Token], pool: Optional[TransitionPool] = None):
         self.tokens = list(tokens)
         self.index = 0
         self.current = self.tokens[0]
+        self.pool = pool if pool is not None else TransitionPool()
 
     def parse(self) -> Scenario:
         self._expect("SCENARIO")
@@ -186,8 +238,18 @@ class Parser:
         if self.current.type == "RBRACE":
             raise ParseError("State must contain at least one rule", self.current.line, self.current.column)
 
-        while self.current.type in ("INTENT", "DEFAULT"):
-            if self.current.type == "INTENT":
+        timeout: Optional[float] = None
+
+        while self.current.type in ("INTENT", "DEFAULT") or self._at_timeout():
+            if self.current.type == "ID":
+                # contextual keyword: "timeout" stays usable as an identifier elsewhere
+                self._advance()
+                value = self._expect("NUMBER").value
+                self._expect("SEMI")
+                if timeout is not None:
+                    raise ParseError(f"Multiple timeout declarations in state '{state_name}'")
+                timeout = float(value)
+            elif self.current.type == "INTENT":
                 self._advance()
                 intent_id = self._expect_id()
                 self._expect("ARROW")
@@ -197,7 +259,7 @@ class Parser:
                 self._expect("SEMI")
                 if intent_id in intents:
                     raise ParseError(f"Duplicate intent '{intent_id}' in state '{state_name}'")
-                intents[intent_id] = Transition(response=response, next_state=next_state)
+                intents[intent_id] = self.pool.get(response, next_state)
             else:
                 self._advance()
                 self._expect("ARROW")
@@ -207,7 +269,7 @@ class Parser:
                 self._expect("SEMI")
                 if default_transition is not None:
                     raise ParseError(f"Multiple default rules in state '{state_name}'")
-                default_transition = Transition(response=response, next_state=next_state)
+                default_transition = self.pool.get(response, next_state)
 
         if self.current.type != "RBRACE":
             raise ParseError("Unexpected token in state body", self.current.line, self.current.column)
@@ -217,7 +279,10 @@ class Parser:
         if default_transition is None:
             raise ParseError(f"State '{state_name}' missing default rule")
 
-        return State(name=state_name, intents=intents, default=default_transition)
+        return State(name=state_name, intents=intents, default=default_transition, timeout=timeout)
+
+    def _at_timeout(self) -> bool:
+        return self.current.type == "ID" and self.current.value == "timeout"
 
     def _parse_next_action(self) -> Optional[str]:
         if self.current.type == "GOTO":
@@ -264,9 +329,188 @@ class Parser:
                 raise ParseError(f"Goto target '{state.default.next_state}' not defined")
 
 
-def parse_script(path: str) -> Scenario:
+# strings are matched first so braces/keywords inside them are skipped
+_BLOCK_SCAN = re.compile(r'"(?:[^"\\]|\\.)*"|[{}]|\bstate\b', re.DOTALL)
+
+
+def _split_state_blocks(text: str) -> Optional[List[Tuple[int, int]]]:
+    """
+    Locate top-level ``state`` blocks as (start, end) offsets without lexing.
+
+    Returns None when the layout is not the plain ``scenario x { ... }`` shape;
+    callers then fall back to a full parse for authoritative errors.
+    """
+    spans: List[Tuple[int, int]] = []
+    depth = 0
+    start: Optional[int] = None
+    for match in _BLOCK_SCAN.finditer(text):
+        tok = match.group()
+        if tok == "{":
+            depth += 1
+        elif tok == "}":
+            depth -= 1
+            if depth < 0:
+                return None
+            if depth == 1 and start is not None:
+                spans.append((start, match.end()))
+                start = None
+        elif tok == "state" and depth == 1:
+            if start is not None:
+                return None
+            start = match.start()
+    if depth != 0 or start is not None:
+        return None
+    return spans
+
+
+class IncrementalParser:
+    """
+    Re-parse only the state blocks that changed since the previous call.
+
+    State blocks are keyed by content hash (their offsets are kept for error
+    locations); unchanged blocks reuse the previously parsed State. The
+    returned Scenario is patched in place and goto targets are re-checked only
+    for edges touching changed or removed states. On ParseError the previous
+    Scenario is left untouched.
+
+    The parser's own TransitionPool is pruned after every reparse so edits do
+    not accumulate dead rules; a pool passed in is shared with other parsers
+    and left for the caller to manage (see ``TransitionPool.retain``).
+    """
+
+    def __init__(self, pool: Optional[TransitionPool] = None) -> None:
+        self.scenario: Optional[Scenario] = None
+        self._owns_pool = pool is None
+        self.pool = pool if pool is not None else TransitionPool()
+        self.last_reparsed = 0
+        self._blocks: Dict[bytes, State] = {}
+        self._incoming: Dict[str, Set[str]] = {}
+
+    def parse(self, text: str) -> Scenario:
+        spans = _split_state_blocks(text)
+        if not spans:
+            return self._full_parse(text, spans)
+        try:
+            name, initial = self._parse_header(text[: spans[0][0]])
+            for (_, prev_end), (next_start, _) in zip(spans, spans[1:]):
+                if text[prev_end:next_start].strip():
+                    raise ParseError("Unexpected text between states")
+            if [tok.type for tok in Lexer(text[spans[-1][1] :]).tokenize()] != ["RBRACE", "EOF"]:
+                raise ParseError("Unexpected text after states")
+        except ParseError:
+            return self._full_parse(text, spans)
+
+        blocks: Dict[bytes, State] = {}
+        states: Dict[str, State] = {}
+        changed: List[State] = []
+        line, line_pos = 1, 0
+        for start, end in spans:
+            block = text[start:end]
+            digest = hashlib.blake2b(block.encode("utf-8"), digest_size=16).digest()
+            state = self._blocks.get(digest)
+            if state is None:
+                line += text.count("\n", line_pos, start)
+                line_pos = start
+                state = self._parse_block(block, line, start - text.rfind("\n", 0, start))
+                changed.append(state)
+            blocks[digest] = state
+            if state.name in states:
+                raise ParseError(f"Duplicate state name '{state.name}'", None, None)
+            states[state.name] = state
+
+        if initial is None:
+            initial = next(iter(states))
+        if initial not in states:
+            raise ParseError(f"Initial state '{initial}' is not defined")
+
+        old_states = self.scenario.states if self.scenario is not None else {}
+        replaced = [old_states[st.name] for st in changed if st.name in old_states]
+        removed = [old for old in old_states.values() if old.name not in states]
+        for state in changed:
+            self._check_targets(state, states)
+        for old in removed:
+            # changed sources were checked above; unchanged ones still point here
+            for source in self._incoming.get(old.name, ()):
+                if source in states and states[source] is old_states.get(source):
+                    raise ParseError(f"Goto target '{old.name}' not defined")
+
+        # validated: commit
+        for old in replaced + removed:
+            for target in _targets(old):
+                self._incoming.get(target, set()).discard(old.name)
+        for state in changed:
+            for target in _targets(state):
+                self._incoming.setdefault(target, set()).add(state.name)
+        self._blocks = blocks
+        self.last_reparsed = len(changed)
+        return self._commit(name, initial, states)
+
+    def _parse_header(self, header: str) -> Tuple[str, Optional[str]]:
+        parser = Parser(Lexer(header).tokenize())
+        parser._expect("SCENARIO")
+        name = parser._expect_id()
+        parser._expect("LBRACE")
+        initial = parser._parse_initial_opt()
+        parser._expect("EOF")
+        return name, initial
+
+    def _parse_block(self, block: str, line: int, column: int) -> State:
+        lexer = Lexer(block)
+        lexer.line, lexer.col = line, column
+        parser = Parser(lexer.tokenize(), self.pool)
+        state = parser._parse_state()
+        parser._expect("EOF")
+        return state
+
+    def _check_targets(self, state: State, states: Dict[str, State]) -> None:
+        for target in _targets(state):
+            if target not in states:
+                raise ParseError(f"Goto target '{target}' not defined")
+
+    def _full_parse(self, text: str, spans: Optional[List[Tuple[int, int]]]) -> Scenario:
+        scenario = Parser(Lexer(text).tokenize(), self.pool).parse()
+        states = list(scenario.states.values())
+        self._blocks = {}
+        if spans and len(spans) == len(states):
+            for (start, end), state in zip(spans, states):
+                digest = hashlib.blake2b(text[start:end].encode("utf-8"), digest_size=16).digest()
+                self._blocks[digest] = state
+        self._incoming = {}
+        for state in states:
+            for target in _targets(state):
+                self._incoming.setdefault(target, set()).add(state.name)
+        self.last_reparsed = len(states)
+        return self._commit(scenario.name, scenario.initial_state, scenario.states)
+
+    def _commit(self, name: str, initial: str, states: Dict[str, State]) -> Scenario:
+        if self._owns_pool:
+            self.pool.retain(states.values())
+        if self.scenario is None:
+            self.scenario = Scenario(name=name, states=states, initial_state=initial)
+            return self.scenario
+        scenario = self.scenario
+        scenario.name = name
+        scenario.initial_state = initial
+        if list(scenario.states) != list(states):
+            scenario.states.clear()
+            scenario.states.update(states)
+        else:
+            for state_name, state in states.items():
+                if scenario.states[state_name] is not state:
+                    scenario.states[state_name] = state
+        return scenario
+
+
+def _targets(state: State) -> Set[str]:
+    targets = {trans.next_state for trans in state.intents.values() if trans.next_state is not None}
+    if state.default.next_state is not None:
+        targets.add(state.default.next_state)
+    return targets
+
+
+def parse_script(path: str, pool: Optional[TransitionPool] = None) -> Scenario:
     with open(path, "r", encoding="utf-8") as f:
         text = f.read()
     lexer = Lexer(text)
-    parser = Parser(lexer.tokenize())
+    parser = Parser(lexer.tokenize(), pool)
     return parser.parse()
@@ -0,0 +1,170 @@
+"""
+Conversation-flow profiler.
+
+Attach a FlowProfiler to interpreters to aggregate, per state and per
+transition, visit counts, default-fallback ratio, classification latency
+and LLM tokens, plus the turns-to-completion distribution. Results export
+as JSON, as a heat-coloured DOT graph of the scenario, or as folded stacks
+for flamegraph tools.
+"""
+
+from __future__ import annotations
+
+import array
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from .interpreter import Interpreter, TurnEvent
+from .model import Scenario
+from .stats import summarize
+
+
+class _StateStats:
+    __slots__ = ("visits", "fallbacks", "latencies", "tokens")
+
+    def __init__(self) -> None:
+        self.visits = 0
+        self.fallbacks = 0
+        self.latencies = array.array("d")
+        self.tokens = 0
+
+
+class _EdgeStats:
+    __slots__ = ("count", "seconds", "tokens")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        self.tokens = 0
+
+
+class FlowProfiler:
+    def __init__(self, scenario: Scenario) -> None:
+        self.scenario = scenario
+        self.states: Dict[str, _StateStats] = {name: _StateStats() for name in scenario.states}
+        # (state, intent or "default", next state or "end") -> stats
+        self.edges: Dict[Tuple[str, str, str], _EdgeStats] = {}
+        self.completions = array.array("L")  # turns per finished conversation
+
+    def attach(self, bot: Interpreter) -> None:
+        """Start recording a conversation's turns."""
+        turns = 0
+
+        def on_turn(event: TurnEvent) -> None:
+            nonlocal turns
+            turns += 1
+            self.record(event)
+            if event.ended:
+                self.completions.append(turns)
+                turns = 0
+
+        bot.add_listener(on_turn)
+
+    def record(self, event: TurnEvent) -> None:
+        stats = self.states.get(event.state)
+        if stats is None:
+            stats = self.states[event.state] = _StateStats()
+        stats.visits += 1
+        if event.intent == "default":
+            stats.fallbacks += 1
+        stats.latencies.append(event.classify_seconds)
+        stats.tokens += event.tokens
+        key = (event.state, event.intent, event.next_state if event.next_state is not None else "end")
+        edge = self.edges.get(key)
+        if edge is None:
+            edge = self.edges[key] = _EdgeStats()
+        edge.count += 1
+        edge.seconds += event.classify_seconds
+        edge.tokens += event.tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        states = {}
+        for name, stats in self.states.items():
+            latency = summarize(stats.latencies)
+            states[name] = {
+                "visits": stats.visits,
+                "fallbacks": stats.fallbacks,
+                "fallback_ratio": stats.fallbacks / stats.visits if stats.visits else 0.0,
+                "classify_ms": {k: (v * 1000 if k != "count" else v) for k, v in latency.items()},
+                "classify_total_ms": sum(stats.latencies) * 1000,
+                "tokens": stats.tokens,
+            }
+        transitions = [
+            {
+                "state": state,
+                "intent": intent,
+                "next": target,
+                "count": edge.count,
+                "classify_total_ms": edge.seconds * 1000,
+                "tokens": edge.tokens,
+            }
+            for (state, intent, target), edge in self.edges.items()
+        ]
+        return {
+            "scenario": self.scenario.name,
+            "states": states,
+            "transitions": transitions,
+            "turns_to_completion": dict(summarize(self.completions), histogram=self._histogram()),
+        }
+
+    def _histogram(self) -> Dict[str, int]:
+        counts: Dict[int, int] = {}
+        for turns in self.completions:
+            counts[turns] = counts.get(turns, 0) + 1
+        return {str(turns): counts[turns] for turns in sorted(counts)}
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=indent)
+
+    def to_dot(self) -> str:
+        """Scenario graph; node fill shows the state's share of total classification time."""
+        totals = {name: sum(stats.latencies) for name, stats in self.states.items()}
+        grand_total = sum(totals.values()) or 1.0
+        max_count = max((edge.count for edge in self.edges.values()), default=1)
+        lines = [f"digraph {_dot_id(self.scenario.name)} {{", "  node [shape=box, style=filled];"]
+        for name, stats in self.states.items():
+            share = totals[name] / grand_total
+            ratio = stats.fallbacks / stats.visits if stats.visits else 0.0
+            label = (
+                f"{name}\\nvisits={stats.visits} fallback={ratio:.0%}\\n"
+                f"classify={totals[name] * 1000:.1f}ms ({share:.0%}) tokens={stats.tokens}"
+            )
+            lines.append(f"  {_dot_id(name)} [label=\"{label}\", fillcolor=\"{_heat(share)}\"];")
+        if any(key[2] == "end" for key in self.edges):
+            lines.append('  "end" [shape=doublecircle, label="end", fillcolor="#dddddd"];')
+        for (state, intent, target), edge in self.edges.items():
+            width = 1 + 4 * edge.count / max_count
+            lines.append(
+                f"  {_dot_id(state)} -> {_dot_id(target)} "
+                f"[label=\"{intent} ({edge.count})\", penwidth={width:.2f}];"
+            )
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    def to_folded(self) -> str:
+        """Folded stacks ``scenario;state;intent <microseconds>`` for flamegraph tools."""
+        lines = []
+        for (state, intent, _), edge in self.edges.items():
+            micros = int(edge.seconds * 1_000_000)
+            if micros:
+                lines.append(f"{self.scenario.name};{state};{intent} {micros}")
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def write(self, path: str) -> List[str]:
+        """Write ``path`` (JSON) plus ``.dot`` and ``.folded`` siblings; returns the paths written."""
+        base = path[:-5] if path.endswith(".json") else path
+        outputs = [(path, self.to_json()), (f"{base}.dot", self.to_dot()), (f"{base}.folded", self.to_folded())]
+        for out_path, content in outputs:
+            with open(out_path, "w", encoding="utf-8") as f:
+                f.write(content)
+        return [out_path for out_path, _ in outputs]
+
+
+def _dot_id(name: str) -> str:
+    return '"' + name.replace('"', '\\"') + '"'
+
+
+def _heat(share: float) -> str:
+    """White (cold) to red (hot)."""
+    level = int(255 - 200 * min(max(share, 0.0), 1.0))
+    return f"#ff{level:02x}{level:02x}"
@@ -0,0 +1,241 @@
+"""
+Fair scheduling of classification work for several scenarios sharing one backend.
+
+Each tenant (usually one scenario) gets its own FIFO queue in front of the
+shared IntentService. Queues are served by deficit round-robin. In each round
+a backlogged tenant earns ``weight`` call credits, and every backend call
+costs one credit. A flood from one tenant therefore delays only that tenant's
+own queue. Both the scheduler as a whole and each tenant have concurrency
+caps. When a tenant's queue is full, new requests are shed (the classifier
+abstains, so the state's default rule answers) instead of piling up.
+
+    scheduler = FairScheduler(llm, max_concurrency=16)
+    refund = Interpreter(refund_scenario, scheduler.for_tenant("refund_bot", weight=1, max_concurrency=8))
+    travel = Interpreter(travel_scenario, scheduler.for_tenant("travel_bot", weight=2))
+
+All tenants must be driven from one running event loop (process_input_async,
+BatchRunner, SessionManager). The blocking Interpreter.process_input starts a
+new loop per turn, so it only works while no other work is pending.
+"""
+
+from __future__ import annotations
+
+import array
+import asyncio
+import inspect
+import logging
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional
+
+from .intent_service import IntentResult, IntentService
+from .stats import summarize
+
+if TYPE_CHECKING:
+    from .context import ConversationContext
+
+logger = logging.getLogger(__name__)
+
+
+class _Request:
+    __slots__ = ("future", "args", "context", "enqueued", "task")
+
+    def __init__(self, future: "asyncio.Future[IntentResult]", args: tuple, context: Any) -> None:
+        self.future = future
+        self.args = args
+        self.context = context
+        self.enqueued = time.perf_counter()
+        self.task: Optional[asyncio.Task] = None
+
+
+class Tenant:
+    """Queue, DRR credit, caps and metrics of one tenant."""
+
+    def __init__(self, name: str, weight: float, max_concurrency: Optional[int], max_queue: Optional[int]) -> None:
+        if weight <= 0:
+            raise ValueError("weight must be > 0")
+        self.name = name
+        self.weight = weight
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.pending: Deque[_Request] = deque()
+        self.deficit = 0.0
+        self.active = False
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.queue_times = array.array("d")
+        self.service_times = array.array("d")
+
+    @property
+    def capped(self) -> bool:
+        return self.max_concurrency is not None and self.in_flight >= self.max_concurrency
+
+    def stats(self) -> Dict[str, Any]:
+        queue_ms = {k: (v * 1000 if k != "count" else v) for k, v in summarize(self.queue_times).items()}
+        service_ms = {k: (v * 1000 if k != "count" else v) for k, v in summarize(self.service_times).items()}
+        return {
+            "weight": self.weight,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+            "errors": self.errors,
+            "queued": len(self.pending),
+            "in_flight": self.in_flight,
+            "max_depth": self.max_depth,
+            "queue_ms": queue_ms,
+            "service_ms": service_ms,
+        }
+
+
+class TenantIntentService:
+    """IntentService view of one tenant; pass it to that scenario's interpreters."""
+
+    accepts_context = True
+
+    def __init__(self, scheduler: "FairScheduler", tenant: Tenant) -> None:
+        self.scheduler = scheduler
+        self.tenant = tenant
+
+    async def identify(
+        self,
+        text: str,
+        state: str,
+        intents: List[str],
+        context: Optional["ConversationContext"] = None,
+    ) -> IntentResult:
+        return await self.scheduler.submit(self.tenant, (text, state, intents), context)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.tenant.stats()
+
+
+class FairScheduler:
+    def __init__(self, backend: IntentService, max_concurrency: int = 8) -> None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.tenants: Dict[str, Tenant] = {}
+        self._active: Deque[Tenant] = deque()  # tenants with queued work, in round-robin order
+        self._in_flight = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def for_tenant(
+        self,
+        name: str,
+        weight: float = 1.0,
+        max_concurrency: Optional[int] = None,
+        max_queue: Optional[int] = None,
+    ) -> TenantIntentService:
+        """Register (or reconfigure) a tenant and return its IntentService."""
+        tenant = self.tenants.get(name)
+        if tenant is None:
+            tenant = self.tenants[name] = Tenant(name, weight, max_concurrency, max_queue)
+        else:
+            if weight <= 0:
+                raise ValueError("weight must be > 0")
+            tenant.weight, tenant.max_concurrency, tenant.max_queue = weight, max_concurrency, max_queue
+        return TenantIntentService(self, tenant)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def submit(self, tenant: Tenant, args: tuple, context: Any = None) -> IntentResult:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            if self._in_flight or self._active:
+                raise RuntimeError("FairScheduler is in use from another event loop")
+            self._loop = loop
+        tenant.submitted += 1
+        if tenant.max_queue is not None and len(tenant.pending) >= tenant.max_queue:
+            tenant.rejected += 1
+            logger.warning("Tenant %s queue full (%s); shedding classification", tenant.name, tenant.max_queue)
+            return None
+        request = _Request(loop.create_future(), args, context)
+        tenant.pending.append(request)
+        tenant.max_depth = max(tenant.max_depth, len(tenant.pending))
+        if not tenant.active:
+            tenant.active = True
+            self._active.append(tenant)
+        self._dispatch()
+        try:
+            return await request.future
+        except asyncio.CancelledError:
+            # still queued: skipped when dequeued; already running: stop the backend call
+            if request.task is not None:
+                request.task.cancel()
+            raise
+
+    def _dispatch(self) -> None:
+        """Start queued requests in deficit round-robin order while slots are free."""
+        skipped = 0  # consecutive tenants skipped for their concurrency cap
+        while self._in_flight < self.max_concurrency and self._active and skipped < len(self._active):
+            tenant = self._active[0]
+            if tenant.capped:
+                self._active.rotate(-1)
+                skipped += 1
+                continue
+            if tenant.deficit < 1.0:
+                tenant.deficit += tenant.weight
+            started = 0
+            while tenant.deficit >= 1.0 and tenant.pending and not tenant.capped and self._in_flight < self.max_concurrency:
+                request = tenant.pending.popleft()
+                if request.future.done():  # caller gave up while queued
+                    tenant.cancelled += 1
+                    continue
+                tenant.deficit -= 1.0
+                self._start(tenant, request)
+                started += 1
+            if not tenant.pending:
+                self._active.popleft()
+                tenant.active = False
+                tenant.deficit = 0.0
+            elif tenant.deficit < 1.0 or tenant.capped:
+                self._active.rotate(-1)
+            else:
+                break  # out of global slots mid-turn; this tenant resumes first
+            skipped = 0 if started else skipped
+
+    def _start(self, tenant: Tenant, request: _Request) -> None:
+        self._in_flight += 1
+        tenant.in_flight += 1
+        tenant.queue_times.append(time.perf_counter() - request.enqueued)
+        request.task = asyncio.ensure_future(self._run(tenant, request))
+
+    async def _run(self, tenant: Tenant, request: _Request) -> None:
+        started = time.perf_counter()
+        try:
+            text, state, intents = request.args
+            if request.context is not None and getattr(self.backend, "accepts_context", False):
+                result = self.backend.identify(text, state, intents, context=request.context)
+            else:
+                result = self.backend.identify(text, state, intents)
+            if inspect.isawaitable(result):
+                result = await result
+        except asyncio.CancelledError:
+            tenant.cancelled += 1
+            if not request.future.done():
+                request.future.cancel()
+        except Exception as exc:
+            tenant.errors += 1
+            if not request.future.done():
+                request.future.set_exception(exc)
+        else:
+            tenant.completed += 1
+            tenant.service_times.append(time.perf_counter() - started)
+            if not request.future.done():
+                request.future.set_result(result)
+        finally:
+            self._in_flight -= 1
+            tenant.in_flight -= 1
+            self._dispatch()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: tenant.stats() for name, tenant in self.tenants.items()}
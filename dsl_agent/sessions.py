@@ -0,0 +1,107 @@
+"""
+Session layer: many interpreters sharing one idle-timeout timer wheel.
+
+Each live session has at most one armed timer. It is cancelled when a turn
+starts and re-armed when the turn finishes, using the current state's
+``timeout`` if the script declares one, else the manager's ``idle_timeout``.
+When a timer fires, the state's ``default`` rule runs with an empty input,
+just like a user sending an empty line. A single driver task advances the
+wheel, so there is no per-session event-loop timer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from .interpreter import Interpreter
+from .timers import TimerWheel
+
+logger = logging.getLogger(__name__)
+
+TimeoutCallback = Callable[[Hashable, str], None]
+
+
+class SessionManager:
+    def __init__(
+        self,
+        idle_timeout: Optional[float] = None,
+        on_timeout: Optional[TimeoutCallback] = None,
+        tick: float = 0.1,
+        wheel: Optional[TimerWheel] = None,
+    ) -> None:
+        self.idle_timeout = idle_timeout
+        self.on_timeout = on_timeout
+        self.wheel: TimerWheel = wheel if wheel is not None else TimerWheel(tick=tick)
+        self.sessions: Dict[Hashable, Interpreter] = {}
+        self.timeouts = 0
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self.sessions)
+
+    def add(self, session: Hashable, bot: Interpreter) -> Interpreter:
+        self.sessions[session] = bot
+        self._arm(session, bot)
+        return bot
+
+    def get(self, session: Hashable) -> Interpreter:
+        return self.sessions[session]
+
+    def remove(self, session: Hashable) -> Optional[Interpreter]:
+        self.wheel.cancel(session)
+        return self.sessions.pop(session, None)
+
+    def timeout_for(self, bot: Interpreter) -> Optional[float]:
+        """Effective idle timeout for the bot's current state; None when disabled."""
+        if bot.ended:
+            return None
+        override = bot.scenario.get_state(bot.current_state).timeout
+        seconds = override if override is not None else self.idle_timeout
+        return seconds if seconds is not None and seconds > 0 else None
+
+    def _arm(self, session: Hashable, bot: Interpreter) -> None:
+        seconds = self.timeout_for(bot)
+        if seconds is None:
+            self.wheel.cancel(session)
+        else:
+            self.wheel.arm(session, seconds)
+
+    async def process(self, session: Hashable, text: str) -> str:
+        """Run one turn; the session's timer is paused while it is in flight."""
+        bot = self.sessions[session]
+        self.wheel.cancel(session)
+        try:
+            return await bot.process_input_async(text)
+        finally:
+            # also re-armed when the turn is cancelled or fails, so the session can still time out
+            if self.sessions.get(session) is bot:
+                self._arm(session, bot)
+
+    def expire(self, now: Optional[float] = None) -> List[Tuple[Hashable, str]]:
+        """Fire the default rule of every session whose timer is due; returns (session, reply)."""
+        fired: List[Tuple[Hashable, str]] = []
+        for session in self.wheel.advance(now):
+            bot = self.sessions.get(session)
+            if bot is None or bot.ended:
+                continue
+            logger.info(
+                "Idle timeout %.2fs reached, triggering default flow",
+                self.timeout_for(bot) or 0.0,
+            )
+            reply = bot.trigger_default()
+            self.timeouts += 1
+            self._arm(session, bot)
+            fired.append((session, reply))
+            if self.on_timeout is not None:
+                self.on_timeout(session, reply)
+        return fired
+
+    async def run_timers(self) -> None:
+        """Drive the wheel until cancelled."""
+        while True:
+            await asyncio.sleep(self.wheel.tick)
+            self.expire()
@@ -0,0 +1,89 @@
+"""Small latency/percentile helpers shared by the load and profiling tools."""
+
+from __future__ import annotations
+
+import array
+import math
+import os
+import random
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile (q in [0, 100]) of an already sorted sequence; 0.0 if empty."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(values: Iterable[float]) -> Dict[str, float]:
+    """count/mean/p50/p95/p99/max of a sample."""
+    ordered: List[float] = sorted(values)
+    count = len(ordered)
+    return {
+        "count": count,
+        "mean": sum(ordered) / count if count else 0.0,
+        "p50": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1] if ordered else 0.0,
+    }
+
+
+class Reservoir:
+    """
+    Bounded uniform sample of an unbounded stream (reservoir sampling, algorithm R).
+
+    For latency stats of long-running services: memory stays at ``size``
+    values. count, mean and max cover every value added; percentiles come
+    from the sample.
+    """
+
+    __slots__ = ("size", "values", "count", "total", "max", "_random")
+
+    def __init__(self, size: int = 4096, rng: Optional[random.Random] = None) -> None:
+        if size < 1:
+            raise ValueError("size must be >= 1")
+        self.size = size
+        self.values = array.array("d")
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._random = rng or random.Random()
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self.values)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        if len(self.values) < self.size:
+            self.values.append(value)
+        else:
+            slot = self._random.randrange(self.count)
+            if slot < self.size:
+                self.values[slot] = value
+
+    def summary(self) -> Dict[str, float]:
+        """Like summarize(), with exact count/mean/max."""
+        result = summarize(self.values)
+        result.update(count=self.count, mean=self.total / self.count if self.count else 0.0, max=self.max)
+        return result
+
+
+def rss_bytes(pid: Optional[int] = None) -> int:
+    """Current resident set size of a process (Linux /proc), falling back to peak RSS of this one."""
+    try:
+        with open(f"/proc/{pid or 'self'}/statm", "r", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        if pid is not None:
+            return 0
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
@@ -0,0 +1,85 @@
+"""
+Hashed timer wheel for idle timeouts across many sessions.
+
+Arming and cancelling are O(1) dict operations; advancing the wheel touches
+only the slots whose ticks have passed. One driver task per process replaces
+one event-loop timer per session.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Callable, Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+
+class TimerWheel(Generic[K]):
+    """
+    ``slots`` buckets of ``tick`` seconds each. A timer lands in the bucket of
+    its expiry tick; timers more than one revolution away stay in their bucket
+    until their tick comes round. Expiry resolution is one tick.
+    """
+
+    def __init__(self, tick: float = 0.1, slots: int = 512, clock: Callable[[], float] = time.monotonic) -> None:
+        if tick <= 0 or slots < 1:
+            raise ValueError("tick must be > 0 and slots >= 1")
+        self.tick = tick
+        self.clock = clock
+        self._slots: List[Dict[K, int]] = [{} for _ in range(slots)]
+        self._where: Dict[K, int] = {}  # key -> expiry tick
+        self._origin = clock()
+        self._current = 0  # last tick processed
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._where
+
+    def _tick_at(self, now: float) -> int:
+        return int((now - self._origin) / self.tick)
+
+    def arm(self, key: K, delay: float, now: Optional[float] = None) -> None:
+        """(Re)arm ``key`` to expire ``delay`` seconds from ``now``."""
+        self.cancel(key)
+        now = self.clock() if now is None else now
+        # round up so a timer never fires early, and never into an already processed tick
+        expiry = max(self._current + 1, -int(-(now - self._origin + delay) // self.tick))
+        self._where[key] = expiry
+        self._slots[expiry % len(self._slots)][key] = expiry
+
+    def cancel(self, key: K) -> bool:
+        expiry = self._where.pop(key, None)
+        if expiry is None:
+            return False
+        del self._slots[expiry % len(self._slots)][key]
+        return True
+
+    def advance(self, now: Optional[float] = None) -> List[K]:
+        """Expire and return every key whose deadline is at or before ``now``."""
+        target = self._tick_at(self.clock() if now is None else now)
+        fired: List[K] = []
+        slots = len(self._slots)
+        # after a long pause every slot is visited once rather than every missed tick
+        start = max(self._current + 1, target - slots + 1)
+        for tick in range(start, target + 1):
+            bucket = self._slots[tick % slots]
+            if not bucket:
+                continue
+            due = [key for key, expiry in bucket.items() if expiry <= target]
+            for key in due:
+                del bucket[key]
+                del self._where[key]
+            fired.extend(due)
+        self._current = max(self._current, target)
+        return fired
+
+    def next_deadline(self) -> Optional[float]:
+        """Earliest pending expiry time (O(n); for tests and diagnostics)."""
+        if not self._where:
+            return None
+        return self._origin + min(self._where.values()) * self.tick
+
+    def pending(self) -> List[Tuple[K, float]]:
+        return [(key, self._origin + expiry * self.tick) for key, expiry in self._where.items()]
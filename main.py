@@ -1,8 +1,11 @@
-from dsl_agent.cli import run_cli
+import time
 
 
 def main():
-    run_cli()
+    started = time.perf_counter()
+    from dsl_agent.cli import run_cli
+
+    run_cli(import_seconds=time.perf_counter() - started)
 
 
 if __name__ == "__main__":
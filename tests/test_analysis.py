@@ -0,0 +1,75 @@
+import pathlib
+import time
+
+from dsl_agent import analysis, parser
+from dsl_agent.model import Scenario, State, Transition
+
+
+def load_scenario(name: str):
+    return parser.parse_script(pathlib.Path(__file__).parent / "data" / name)
+
+
+def make_scenario(edges, initial="s0", ends=()):
+    states = {}
+    for name, targets in edges.items():
+        intents = {f"i{k}": Transition(response="", next_state=t) for k, t in enumerate(targets[1:])}
+        default_target = None if name in ends else targets[0]
+        states[name] = State(name=name, intents=intents, default=Transition(response="", next_state=default_target))
+    return Scenario(name="gen", states=states, initial_state=initial)
+
+
+def test_sample_scripts_are_clean():
+    report = analysis.analyze(load_scenario("travel_bot.dsl"))
+    assert report.ok
+    assert report.unreachable == []
+    assert sorted(map(sorted, report.cycles)) == [["flight"], ["flight_date"], ["order"], ["routing"]]
+
+
+def test_detects_unreachable_dead_and_trap_states():
+    scenario = make_scenario(
+        {
+            "s0": ["a", "b"],
+            "a": ["done"],
+            "b": ["c"],
+            "c": ["b"],
+            "trap": ["trap"],
+            "orphan": ["s0"],
+            "done": ["done"],
+        },
+        ends={"done"},
+    )
+    scenario.states["s0"].intents["i9"] = Transition(response="", next_state="trap")
+
+    report = analysis.analyze(scenario)
+    assert report.unreachable == ["orphan"]
+    assert report.no_end_path == ["b", "c", "trap"]
+    assert report.default_only_self_loops == ["trap"]
+    assert ["b", "c"] in [sorted(c) for c in report.cycles]
+    assert not report.ok
+
+    pruned = analysis.prune_unreachable(scenario)
+    assert "orphan" not in pruned.states and len(pruned.states) == 6
+
+
+def test_scales_to_large_generated_scenarios():
+    n = 50_000
+    edges = {f"s{i}": [f"s{(i + 1) % n}", f"s{(i * 7) % n}"] for i in range(n)}
+    scenario = make_scenario(edges, ends={f"s{n - 1}"})
+
+    started = time.perf_counter()
+    report = analysis.analyze(scenario)
+    assert time.perf_counter() - started < 5
+    assert len(report.reachable) == n
+    assert report.no_end_path == []
+    assert max(len(c) for c in report.cycles) == n - 1  # only s0 (self-loop) is outside
+
+
+def test_memory_footprint_counts_shared_transitions_once():
+    scenario = load_scenario("travel_bot.dsl")
+    report = analysis.memory_footprint(scenario)
+
+    assert report.states == 5 and report.transitions == 13
+    # start and routing share their ask_order/ask_flight rules and default reply
+    assert report.shared_transitions == 3
+    assert report.total_bytes == report.model_bytes + report.container_bytes + report.string_bytes
+    assert "unique=10" in report.summary()
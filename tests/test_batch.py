@@ -0,0 +1,114 @@
+import asyncio
+import io
+import json
+import pathlib
+
+import pytest
+
+from dsl_agent import parser
+from dsl_agent.batch import BatchRunner, parse_record
+from dsl_agent.intent_service import StubIntentService
+
+
+def load_scenario(name: str):
+    return parser.parse_script(pathlib.Path(__file__).parent / "data" / name)
+
+
+def run_batch(runner, lines):
+    async def main():
+        queue = asyncio.Queue()
+        for line in lines + [None]:
+            queue.put_nowait(line)
+        return await runner.run(queue)
+
+    return asyncio.run(main())
+
+
+def test_parse_record_json_and_plain():
+    assert parse_record('{"session": "s1", "text": "hi"}') == ("s1", "hi")
+    assert parse_record("hello") == ("default", "hello")
+    assert parse_record('{"session": null, "text": null}') == ("default", "")
+    assert parse_record('{"session": "s1", "close": true}') == ("s1", None)
+    for bad in ('{"session": 7, "text": "hi"}', '{"session": "s1", "text": ["hi"]}', '{"session": "s1", "close": 1}'):
+        with pytest.raises(ValueError):
+            parse_record(bad)
+
+
+def test_batch_keeps_per_session_order_and_restarts_ended_sessions():
+    stub = StubIntentService(
+        mapping={"start": {"hi": "greeting"}, "routing": {"order": "ask_order"}, "order": {"1": "provide_order"}}
+    )
+    out = io.BytesIO()
+    runner = BatchRunner(load_scenario("travel_bot.dsl"), stub, out, concurrency=2)
+    lines = [
+        json.dumps({"session": "a", "text": "hi"}),
+        json.dumps({"session": "b", "text": "hi"}),
+        json.dumps({"session": "a", "text": "order"}),
+        json.dumps({"session": "a", "text": "1"}),
+        json.dumps({"session": "a", "text": "again"}),
+        "{not json",
+        "",
+    ]
+
+    stats = run_batch(runner, lines)
+
+    records = [json.loads(line) for line in out.getvalue().decode("utf-8").splitlines()]
+    session_a = [r for r in records if r.get("session") == "a"]
+    assert [r["seq"] for r in session_a] == [0, 2, 3, 4]
+    assert session_a[2]["ended"] is True and "1" in session_a[2]["reply"]
+    # a record after the end starts a new conversation, however fast it arrives
+    assert session_a[3]["state"] == "routing" and session_a[3]["ended"] is False
+    assert stats == {"records": 6, "replies": 5, "errors": 1, "closed": 0, "sessions": 3}
+
+
+class _FlushLog(io.BytesIO):
+    def __init__(self) -> None:
+        super().__init__()
+        self.flushed_at = []
+
+    def flush(self) -> None:
+        super().flush()
+        self.flushed_at.append(len(self.getvalue().splitlines()))
+
+
+def test_batch_flushes_when_idle_and_drops_ended_sessions():
+    stub = StubIntentService(
+        mapping={"start": {"hi": "greeting"}, "routing": {"order": "ask_order"}, "order": {"1": "provide_order"}}
+    )
+    out = _FlushLog()
+    runner = BatchRunner(load_scenario("travel_bot.dsl"), stub, out)
+
+    async def main():
+        queue = asyncio.Queue()
+        task = asyncio.create_task(runner.run(queue))
+        for text in ["hi", "order", "1"]:
+            queue.put_nowait(json.dumps({"session": "a", "text": text}))
+            await asyncio.sleep(0.01)
+            assert len(out.getvalue().splitlines()) == out.flushed_at[-1]  # reply is out before the next line
+        assert runner.sessions == {} and runner._queues == {}
+        assert asyncio.all_tasks() == {asyncio.current_task(), task}  # finished workers are not kept
+        queue.put_nowait(json.dumps({"session": "a", "text": "hi"}))  # the id starts a new conversation
+        queue.put_nowait(None)
+        return await task
+
+    stats = asyncio.run(main())
+    assert stats == {"records": 4, "replies": 4, "errors": 0, "closed": 0, "sessions": 2}
+
+
+def test_close_record_ends_the_session():
+    stub = StubIntentService(mapping={"start": {"hi": "greeting"}})
+    out = io.BytesIO()
+    runner = BatchRunner(load_scenario("travel_bot.dsl"), stub, out)
+    lines = [
+        json.dumps({"session": "a", "text": "hi"}),
+        json.dumps({"session": "a", "close": True}),
+        json.dumps({"session": "a", "text": "hi"}),  # after a close: a new conversation
+        json.dumps({"session": "gone", "close": True}),  # nothing to close, still acknowledged
+    ]
+
+    stats = run_batch(runner, lines)
+
+    records = {r["seq"]: r for r in map(json.loads, out.getvalue().decode("utf-8").splitlines())}
+    assert records[1] == {"seq": 1, "session": "a", "closed": True}
+    assert records[2]["state"] == "routing" and records[3]["closed"] is True
+    assert stats == {"records": 4, "replies": 2, "errors": 0, "closed": 2, "sessions": 2}
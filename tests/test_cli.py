@@ -0,0 +1,131 @@
+import asyncio
+import io
+import json
+import pathlib
+
+from dsl_agent import cli, parser
+from dsl_agent.fuzzy import FuzzyStubIntentService
+from dsl_agent.intent_service import StubIntentService
+from dsl_agent.interpreter import Interpreter
+
+
+def load_scenario(name: str):
+    return parser.parse_script(pathlib.Path(__file__).parent / "data" / name)
+
+
+def run_repl(bot, items, idle_timeout=None, interactive=False):
+    async def main():
+        lines = asyncio.Queue()
+        for item in items:
+            lines.put_nowait(item)
+        await cli._run_repl(bot, lines, idle_timeout, interactive, show_intent=False)
+
+    asyncio.run(main())
+
+
+def test_repl_processes_piped_lines_in_order(capsys):
+    stub = StubIntentService(mapping={"start": {"hi": "greeting"}, "routing": {"order": "ask_order"}})
+    bot = Interpreter(load_scenario("travel_bot.dsl"), stub)
+
+    run_repl(bot, ["hi", "order", None])
+
+    out = capsys.readouterr().out
+    assert "您好" in out and "订单号" in out
+    assert ">" not in out  # no prompts for piped input
+    assert bot.current_state == "order"
+
+
+def test_repl_idle_timeout_triggers_default(capsys):
+    bot = Interpreter(load_scenario("travel_bot.dsl"), StubIntentService(mapping={}))
+
+    async def main():
+        lines = asyncio.Queue()
+        asyncio.get_running_loop().call_later(0.2, lines.put_nowait, "exit")
+        await cli._run_repl(bot, lines, 0.05, interactive=False, show_intent=False)
+
+    asyncio.run(main())
+    assert "哪一项" in capsys.readouterr().out
+    assert bot.current_state == "routing"
+
+
+class _SlowStub(StubIntentService):
+    async def identify(self, text, state, intents):
+        if text == "slow":
+            await asyncio.sleep(10)
+        return await super().identify(text, state, intents)
+
+
+def test_repl_new_input_cancels_inflight_classification(capsys):
+    bot = Interpreter(load_scenario("travel_bot.dsl"), _SlowStub(mapping={"start": {"hi": "greeting"}}))
+
+    async def main():
+        lines = asyncio.Queue()
+        lines.put_nowait("slow")
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.05, lines.put_nowait, "hi")
+        loop.call_later(0.1, lines.put_nowait, None)
+        await asyncio.wait_for(cli._run_repl(bot, lines, None, interactive=True, show_intent=False), 2)
+
+    asyncio.run(main())
+    out = capsys.readouterr().out
+    assert "您好" in out
+    assert "哪一项" not in out  # the superseded "slow" turn never replied
+    assert bot.current_state == "routing"
+
+
+def test_startup_profile_total_excludes_non_startup_phases():
+    profile = cli.StartupProfile(import_seconds=0.010)
+    profile.record("parse", 0.005)
+    profile.record("batch", 1.0, startup=False)
+    report = profile.report()
+    assert "batch=1000.0" in report and report.endswith("total=15.0")
+
+
+def test_llm_cascade_puts_stub_mapping_before_keywords(tmp_path: pathlib.Path):
+    mapping = tmp_path / "mapping.json"
+    mapping.write_text(json.dumps({"routing": {"order": "ask_order"}}), encoding="utf-8")
+    settings = {
+        "use_stub": False,
+        "api_base": "http://127.0.0.1:9/v1",
+        "api_key": "k",
+        "model": "m",
+        "llm_scoring": "generate",
+        "stub_mapping": str(mapping),
+        "intent_keywords": {"travel_bot": {"ask_flight": ["机票"]}},
+        "cascade_threshold": 0.6,
+    }
+    service = cli._build_intent_service(settings, scenario_name="travel_bot")
+
+    assert [tier.name for tier in service.tiers] == ["stub", "keyword", "llm"]
+    assert asyncio.run(service.identify("order", "routing", ["ask_order", "ask_flight"])) == ("ask_order", 1.0)
+
+
+def test_stub_mapping_implies_stub_unless_llm_is_explicit(tmp_path: pathlib.Path, monkeypatch):
+    monkeypatch.delenv("DSL_USE_STUB", raising=False)
+    mapping = tmp_path / "mapping.json"
+    mapping.write_text(json.dumps({"routing": {"order": "ask_order"}}), encoding="utf-8")
+    parser = cli._build_arg_parser()
+
+    implied = cli._resolve_settings(parser.parse_args(["bot.dsl", "--stub-mapping", str(mapping)]), {})
+    assert implied["use_stub"] is True
+    assert isinstance(cli._build_intent_service(implied, "travel_bot"), FuzzyStubIntentService)
+
+    explicit = cli._resolve_settings(parser.parse_args(["bot.dsl", "--stub-mapping", str(mapping), "--no-stub"]), {})
+    assert explicit["use_stub"] is False
+
+
+class _FakeTty(io.StringIO):
+    def isatty(self) -> bool:
+        return True
+
+    def fileno(self) -> int:
+        raise AssertionError("a terminal must not be handed to connect_read_pipe")
+
+
+def test_pump_stdin_reads_terminals_in_a_thread():
+    async def main():
+        lines = asyncio.Queue()
+        await cli._pump_stdin(lines, _FakeTty("hi\r\nexit\n"))
+        return [await asyncio.wait_for(lines.get(), 1.0) for _ in range(3)]
+
+    assert asyncio.run(main()) == ["hi", "exit", None]
@@ -0,0 +1,41 @@
+import importlib.util
+import pathlib
+
+from dsl_agent import codegen, parser
+from dsl_agent.interpreter import Interpreter
+
+
+def build_script(n_intents: int) -> str:
+    rules = "".join(
+        f'intent i{k} -> "got {{user_input}} for {k} {{user_input}}" -> goto {"second" if k % 2 else "first"}; '
+        for k in range(n_intents)
+    )
+    return (
+        "scenario big { initial first; "
+        f'state first {{ timeout 3; {rules}default -> "fallback \\"{{user_input}}\\"" -> goto second; }} '
+        'state second { intent bye -> "bye" -> end; default -> "again" -> goto first; } }'
+    )
+
+
+def test_compiled_dispatch_matches_interpreter(tmp_path: pathlib.Path):
+    script = tmp_path / "big.dsl"
+    script.write_text(build_script(codegen.TABLE_DISPATCH_MIN + 2), encoding="utf-8")
+    scenario = parser.parse_script(script)
+    path = codegen.compile_scenario(scenario, str(tmp_path / "big_gen.py"))
+    assert pathlib.Path(importlib.util.cache_from_source(path)).exists()
+    compiled = codegen.load_compiled(path)
+
+    assert compiled.initial_state == "first"
+    assert compiled.get_state("first").intents == tuple(scenario.states["first"].intents)
+    assert compiled.get_state("first").timeout == 3.0
+    reference = Interpreter(scenario, None)  # type: ignore[arg-type]
+    for state in scenario.states.values():
+        for intent in [*state.intents, None, "unknown"]:
+            expected = reference._route(state, intent, "x{user_input}y")
+            assert compiled.states[state.name].dispatch(intent, "x{user_input}y") == expected
+
+
+def test_generated_source_is_deterministic(tmp_path: pathlib.Path):
+    scenario = parser.parse_script(pathlib.Path(__file__).parent / "data" / "travel_bot.dsl")
+    assert codegen.generate_source(scenario) == codegen.generate_source(scenario)
+    assert "import" not in codegen.generate_source(scenario)
@@ -0,0 +1,22 @@
+import pathlib
+
+from dsl_agent.config import load_config, str_to_bool
+
+
+def test_load_config_flattens_sections(tmp_path: pathlib.Path):
+    path = tmp_path / "bot.ini"
+    path.write_text(
+        "[llm]\nmodel = qwen-plus\n"
+        "[settings]\nuse_stub = false\n"
+        "[intent_descriptions.travel_bot]\nask_order = 查询订单\n"
+        '[intent_keywords.travel_bot]\nask_order = "订单, 单号"\n'
+        "[welcome.travel_bot]\nmessage = 你好\n",
+        encoding="utf-8",
+    )
+    config = load_config(str(path))
+
+    assert config["model"] == "qwen-plus" and not str_to_bool(config["use_stub"], True)
+    assert config["intent_descriptions"] == {"travel_bot": {"ask_order": "查询订单"}}
+    assert config["intent_keywords"] == {"travel_bot": {"ask_order": ["订单", "单号"]}}
+    assert config["welcome_messages"] == {"travel_bot": "你好"}
+    assert load_config(None) == {}
@@ -0,0 +1,43 @@
+import asyncio
+import pathlib
+
+from dsl_agent import evaluation
+from dsl_agent.fake_llm import FakeLLMServer
+
+DATA_DIR = pathlib.Path(__file__).parent / "data"
+MAPPING = str(DATA_DIR / "golden_travel.json")
+
+
+def run(specs, settings=None):
+    items = evaluation.load_dataset(str(DATA_DIR / "eval_travel.jsonl"))
+    evaluator = evaluation.Evaluator(items, evaluation.default_factory(settings or {}), concurrency=4)
+    parsed = [evaluation.parse_classifier_spec(spec) for spec in specs]
+    return asyncio.run(evaluation.evaluate_all(evaluator, parsed))
+
+
+def test_parse_classifier_spec():
+    spec = evaluation.parse_classifier_spec("short=llm:model=qwen,max_tokens=4,price_per_1k=0.5")
+    assert spec.name == "short" and spec.backend == "llm"
+    assert spec.params == {"model": "qwen", "max_tokens": 4, "price_per_1k": 0.5}
+    assert evaluation.parse_classifier_spec(f"stub:mapping={MAPPING}").params["mapping"]["start"] == {"hi": "greeting"}
+
+
+def test_compares_exact_and_fuzzy_stub():
+    exact, fuzzy = run([f"stub:mapping={MAPPING}", f"fuzzy:mapping={MAPPING}"])
+
+    assert exact["accuracy"] == 0.5
+    assert fuzzy["accuracy"] == 1.0
+    assert exact["per_state"]["travel_bot.routing"]["confusion"]["ask_order"] == {"ask_order": 1, "none": 2}
+    assert exact["latency_ms"]["count"] == 8
+    text = evaluation.format_reports([exact, fuzzy])
+    assert "fuzzy" in text and "travel_bot.routing" in text
+
+
+def test_counts_llm_tokens_and_cost():
+    with FakeLLMServer() as server:
+        settings = {"api_base": server.base_url, "api_key": "k", "model": "fake"}
+        (report,) = run(["llm:price_per_1k=2"], settings)
+
+    assert report["errors"] == 0
+    assert report["tokens"] > 0
+    assert report["cost"] == report["tokens"] / 1000 * 2
@@ -0,0 +1,104 @@
+import asyncio
+import json
+import math
+import random
+
+import pytest
+from openai import OpenAI
+
+from dsl_agent.fake_llm import FakeLLMConfig, FakeLLMServer, parse_latency, parse_prompt, request_key
+from dsl_agent.intent_service import LLMIntentService, StubIntentService
+
+
+def make_service(base_url: str) -> LLMIntentService:
+    client = OpenAI(api_key="k", base_url=base_url, max_retries=0)
+    return LLMIntentService(api_base=base_url, api_key="k", model="fake", client=client)
+
+
+def test_parse_prompt_roundtrip():
+    svc = LLMIntentService(api_base="http://example", api_key="k", model="m", client=object())
+    prompt = svc._build_prompt("routing", ["ask_order", "ask_flight"], "我要 ask_order")
+    assert parse_prompt(prompt) == ("routing", ["ask_order", "ask_flight"], "我要 ask_order")
+
+
+def test_fake_server_classifies_through_real_client():
+    with FakeLLMServer() as server:
+        svc = make_service(server.base_url)
+        intents = ["ask_order", "ask_flight"]
+        assert asyncio.run(svc.identify("please ask flight", "routing", intents)) == "ask_flight"
+        assert asyncio.run(svc.identify("随便", "routing", intents)) is None
+        assert server.stats["requests"] == 2
+
+
+def test_logprob_scoring_returns_temperature_scaled_confidence():
+    stub = StubIntentService(mapping={"routing": {"机票": "ask_flight"}})
+    with FakeLLMServer(FakeLLMConfig(classifier=stub)) as server:
+        client = make_service(server.base_url).client
+        svc = LLMIntentService(api_base=server.base_url, api_key="k", model="fake", client=client, scoring="logprobs")
+        intents = ["ask_order", "ask_flight"]
+        prompt = svc._build_choice_prompt("routing", intents, "机票")
+        assert parse_prompt(prompt) == ("routing", intents, "机票")
+
+        label, confidence = asyncio.run(svc.identify("机票", "routing", intents))
+        assert label == "ask_flight"
+        assert math.isclose(confidence, 0.9 + 0.1 / 3)
+        assert asyncio.run(svc.identify("随便", "routing", intents)) is None  # argmax is the none option
+
+        sharp = LLMIntentService(
+            api_base=server.base_url, api_key="k", model="fake", client=client, scoring="logprobs", logprob_temperature=0.5
+        )
+        assert asyncio.run(sharp.identify("机票", "routing", intents))[1] > confidence
+
+
+def test_fake_server_injects_errors_and_latency():
+    config = FakeLLMConfig(rate_429=0.5, rate_5xx=0.5, latency=parse_latency("fixed:0.01"), seed=3)
+    with FakeLLMServer(config) as server:
+        svc = make_service(server.base_url)
+        results = [asyncio.run(svc.identify("ask_order", "s", ["ask_order"])) for _ in range(4)]
+        assert results == [None] * 4
+        assert server.stats["injected_429"] + server.stats["injected_5xx"] == 4
+
+
+def test_fake_server_streams_chunks():
+    with FakeLLMServer(FakeLLMConfig(stream_chunk_delay=0.001)) as server:
+        client = OpenAI(api_key="k", base_url=server.base_url, max_retries=0)
+        prompt = 'Current state: s. Allowed intents: [provide_destination]. User said: "provide_destination".'
+        stream = client.chat.completions.create(
+            model="fake", messages=[{"role": "user", "content": prompt}], stream=True
+        )
+        text = "".join(chunk.choices[0].delta.content or "" for chunk in stream)
+        assert text == "provide_destination"
+
+
+def test_fake_server_replays_recorded_responses(tmp_path):
+    body = {"model": "fake", "messages": [{"role": "user", "content": "hi"}]}
+    recorded = {
+        "key": request_key(body),
+        "request": body,
+        "status": 200,
+        "response": {
+            "id": "x",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "fake",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "greeting"}, "finish_reason": "stop"}],
+        },
+    }
+    path = tmp_path / "replay.jsonl"
+    path.write_text(json.dumps(recorded) + "\n", encoding="utf-8")
+
+    with FakeLLMServer(FakeLLMConfig(replay_path=str(path))) as server:
+        client = OpenAI(api_key="k", base_url=server.base_url, max_retries=0)
+        completion = client.chat.completions.create(**body)
+        assert completion.choices[0].message.content == "greeting"
+        with pytest.raises(Exception):
+            client.chat.completions.create(model="fake", messages=[{"role": "user", "content": "other"}])
+        assert server.stats["replay_misses"] == 1
+
+
+def test_parse_latency_specs():
+    rng = random.Random(0)
+    assert parse_latency("fixed:0.2")(rng) == 0.2
+    assert 0.1 <= parse_latency("uniform:0.1,0.3")(rng) <= 0.3
+    with pytest.raises(ValueError):
+        parse_latency("gamma:1")
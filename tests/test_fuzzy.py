@@ -0,0 +1,53 @@
+import asyncio
+import random
+import string
+import time
+
+from dsl_agent.fuzzy import FuzzyStubIntentService, SymSpellIndex, bounded_distance, normalize
+
+
+def test_normalize_folds_width_case_and_whitespace():
+    assert normalize("  ＨＥＬＬＯ　 World ") == "hello world"
+    assert normalize("订单１２３") == "订单123"
+
+
+def test_bounded_distance():
+    assert bounded_distance("order", "order", 2) == 0
+    assert bounded_distance("order", "odrer", 2) == 1  # transposition
+    assert bounded_distance("order", "ordr", 2) == 1
+    assert bounded_distance("order", "flight", 2) == 3
+
+
+def test_fuzzy_stub_matches_typos_and_full_width():
+    svc = FuzzyStubIntentService(
+        mapping={"routing": {"查订单": "ask_order", "book flight": "ask_flight", "hi": "greeting"}},
+        default_intent="greeting",
+    )
+    intents = ["ask_order", "ask_flight", "greeting"]
+
+    assert asyncio.run(svc.identify("ＢＯＯＫ  Flight", "routing", intents)) == ("ask_flight", 1.0)
+    label, confidence = asyncio.run(svc.identify("bok flihgt", "routing", intents))
+    assert label == "ask_flight" and 0.7 < confidence < 1.0
+    # short triggers must match exactly; falls back to the default with zero confidence
+    assert asyncio.run(svc.identify("ho", "routing", intents)) == ("greeting", 0.0)
+    assert asyncio.run(svc.identify("book flight", "routing", ["ask_order"])) is None
+
+
+def test_symspell_lookup_stays_fast_with_many_triggers():
+    rng = random.Random(7)
+    index = SymSpellIndex(max_distance=2)
+    terms = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(6, 14))) for _ in range(20_000)]
+    for i, term in enumerate(terms):
+        index.add(term, f"intent_{i % 50}")
+
+    queries = []
+    for term in rng.sample(terms, 200):
+        pos = rng.randrange(len(term))
+        queries.append((term[:pos] + "x" + term[pos + 1 :], term))
+
+    started = time.perf_counter()
+    hits = sum(1 for query, _ in queries if index.lookup(query) is not None)
+    per_lookup = (time.perf_counter() - started) / len(queries)
+
+    assert hits == len(queries)
+    assert per_lookup < 0.002
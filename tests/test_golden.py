@@ -2,7 +2,9 @@ import json
 import pathlib
 from typing import Any, Dict, List
 
-from dsl_agent import parser
+import pytest
+
+from dsl_agent import codegen, parser
 from dsl_agent.interpreter import Interpreter
 from dsl_agent.intent_service import StubIntentService
 
@@ -14,14 +16,25 @@ def load_case(name: str) -> Dict[str, Any]:
         return json.load(f)
 
 
-def run_golden(case: Dict[str, Any]) -> None:
+@pytest.fixture(params=["interpreted", "compiled"])
+def make_bot(request, tmp_path: pathlib.Path):
+    def build(scenario, intent_service):
+        if request.param == "interpreted":
+            return Interpreter(scenario, intent_service)
+        path = codegen.compile_scenario(scenario, str(tmp_path / f"{scenario.name}_gen.py"))
+        return codegen.CompiledInterpreter(codegen.load_compiled(path), intent_service)
+
+    return build
+
+
+def run_golden(case: Dict[str, Any], make_bot=Interpreter) -> None:
     scenario_file = case["scenario"]
     mapping = case["mapping"]
     steps: List[Dict[str, Any]] = case["steps"]
 
     scenario = parser.parse_script(DATA_DIR / scenario_file)
     stub = StubIntentService(mapping=mapping)
-    bot = Interpreter(scenario, stub)
+    bot = make_bot(scenario, stub)
 
     for step in steps:
         reply = bot.process_input(step["user"])
@@ -31,21 +44,21 @@ def run_golden(case: Dict[str, Any]) -> None:
             assert bot.current_state == step["expect_state"]
 
 
-def test_travel_bot_golden():
-    run_golden(load_case("golden_travel.json"))
+def test_travel_bot_golden(make_bot):
+    run_golden(load_case("golden_travel.json"), make_bot)
 
 
-def test_refund_bot_golden():
-    run_golden(load_case("golden_refund.json"))
+def test_refund_bot_golden(make_bot):
+    run_golden(load_case("golden_refund.json"), make_bot)
 
 
-def test_support_bot_golden():
-    run_golden(load_case("golden_support.json"))
+def test_support_bot_golden(make_bot):
+    run_golden(load_case("golden_support.json"), make_bot)
 
 
-def test_faq_bot_golden():
-    run_golden(load_case("golden_faq.json"))
+def test_faq_bot_golden(make_bot):
+    run_golden(load_case("golden_faq.json"), make_bot)
 
 
-def test_appointment_bot_golden():
-    run_golden(load_case("golden_appointment.json"))
+def test_appointment_bot_golden(make_bot):
+    run_golden(load_case("golden_appointment.json"), make_bot)
@@ -1,6 +1,27 @@
 import asyncio
-
-from dsl_agent.intent_service import LLMIntentService
+import logging
+import pathlib
+import subprocess
+import sys
+import threading
+import time
+
+from dsl_agent.context import ConversationContext
+from dsl_agent.intent_service import (
+    BACKENDS,
+    DEFAULT_CHOICE_SYSTEM_PROMPT,
+    CascadeIntentService,
+    CascadeTier,
+    KeywordIntentService,
+    LLMIntentService,
+    ShadowIntentService,
+    StubIntentService,
+    load_backend,
+    register_backend,
+    split_intent_result,
+)
+
+ROOT = pathlib.Path(__file__).parent.parent
 
 
 class _DummyResp:
@@ -11,8 +32,10 @@ class _DummyResp:
 class _DummyCompletions:
     def __init__(self, content: str):
         self._content = content
+        self.last_kwargs: dict = {}
 
-    def create(self, **_: object):
+    def create(self, **kwargs: object):
+        self.last_kwargs = kwargs
         return _DummyResp(self._content)
 
 
@@ -42,9 +65,168 @@ def test_llm_intent_service_tokenizes_and_strips(monkeypatch):
     assert result == "ask_order"
 
 
+def test_llm_logprob_mode_requests_one_biased_token():
+    client = _DummyClient("B")  # no logprobs in the response: the letter counts as certain
+    svc = LLMIntentService(
+        api_base="http://example", api_key="k", model="m", client=client,
+        scoring="logprobs", label_token_ids={"A": 32, "B": 33, "C": 34},
+    )
+
+    assert asyncio.run(svc.identify("机票", "routing", ["ask_order", "ask_flight"])) == ("ask_flight", 1.0)
+    sent = client.chat.completions.last_kwargs
+    assert sent["max_tokens"] == 1 and sent["logprobs"] is True and sent["top_logprobs"] == 3
+    assert sent["logit_bias"] == {"32": 100, "33": 100, "34": 100}
+    assert "C=none" in sent["messages"][1]["content"]
+    assert sent["messages"][0]["content"] == DEFAULT_CHOICE_SYSTEM_PROMPT
+
+
+def test_llm_logprob_mode_rejects_words_without_logprobs():
+    intents = ["ask_order", "ask_flight", "greeting"]
+    for content in ["Ask", "Book", "Cancel", "B."]:
+        svc = LLMIntentService(
+            api_base="http://example", api_key="k", model="m", client=_DummyClient(content), scoring="logprobs"
+        )
+        assert asyncio.run(svc.identify("机票", "routing", intents)) is None
+
+    client = _DummyClient(" b\n")
+    svc = LLMIntentService(
+        api_base="http://example", api_key="k", model="m", client=client,
+        scoring="logprobs", choice_system_prompt="Letter only.",
+    )
+    assert asyncio.run(svc.identify("机票", "routing", intents)) == ("ask_flight", 1.0)
+    assert client.chat.completions.last_kwargs["messages"][0]["content"] == "Letter only."
+
+
+def test_llm_logprob_mode_warns_once_when_falling_back_to_free_text(caplog):
+    client = _DummyClient("i30")
+    svc = LLMIntentService(api_base="http://example", api_key="k", model="m", client=client, scoring="logprobs")
+    intents = [f"i{n}" for n in range(40)]
+
+    with caplog.at_level(logging.WARNING, logger="dsl_agent.llm"):
+        assert asyncio.run(svc.identify("x", "big", intents)) == "i30"
+        assert asyncio.run(svc.identify("y", "big", intents)) == "i30"
+    assert "logprobs" not in client.chat.completions.last_kwargs
+    assert [r.getMessage() for r in caplog.records if "free-text" in r.getMessage()] == [
+        "State big has 40 intents, more than logprobs scoring supports (25); using free-text generation"
+    ]
+
+
 def test_llm_intent_service_unknown_returns_none(monkeypatch):
     client = _DummyClient("none")
     svc = LLMIntentService(api_base="http://example", api_key="k", model="m", client=client)
 
     result = asyncio.run(svc.identify("hi", "start", ["greeting"]))
     assert result is None
+
+
+def test_cascade_stops_at_first_confident_tier():
+    llm = LLMIntentService(api_base="http://example", api_key="k", model="m", client=_DummyClient("ask_flight"))
+    cascade = CascadeIntentService(
+        [
+            CascadeTier("stub", StubIntentService(mapping={"routing": {"order": "ask_order"}})),
+            CascadeTier("keyword", KeywordIntentService({"ask_order": ["订单"], "ask_flight": ["机票"]}), threshold=0.6),
+            CascadeTier("llm", llm),
+        ]
+    )
+    intents = ["ask_order", "ask_flight"]
+
+    assert asyncio.run(cascade.identify("order", "routing", intents)) == ("ask_order", 1.0)
+    assert asyncio.run(cascade.identify("我要查订单", "routing", intents)) == ("ask_order", 1.0)
+    # 关键词有歧义（置信度 0.5 < 0.6），交给 LLM
+    assert asyncio.run(cascade.identify("订单和机票", "routing", intents)) == ("ask_flight", 1.0)
+
+    stats = cascade.stats()
+    assert stats["stub"] == {"calls": 3, "hits": 1, "hit_rate": 1 / 3}
+    assert stats["keyword"]["hits"] == 1
+    assert stats["llm"] == {"calls": 1, "hits": 1, "hit_rate": 1.0}
+
+
+def test_keyword_service_matches_ascii_keywords_on_word_boundaries():
+    svc = KeywordIntentService({"greeting": ["hi", "你好"], "ask_order": ["order status"]})
+    intents = ["greeting", "ask_order"]
+
+    assert asyncio.run(svc.identify("which one is this", "start", intents)) is None
+    assert asyncio.run(svc.identify("Hi, order status?", "start", intents)) == ("ask_order", 12 / 14)
+    assert asyncio.run(svc.identify("hi你好", "start", intents)) == ("greeting", 1.0)
+    assert asyncio.run(svc.identify("我说你好呀", "start", intents)) == ("greeting", 1.0)  # CJK: substring
+
+
+def test_split_intent_result_accepts_label_or_pair():
+    assert split_intent_result(" Ask_Order ") == ("ask_order", 1.0)
+    assert split_intent_result(("ask_order", 0.25)) == ("ask_order", 0.25)
+    assert split_intent_result(None) == (None, 0.0)
+    assert split_intent_result(("", 0.9)) == (None, 0.0)
+
+
+def test_backends_load_lazily_by_name():
+    assert load_backend("stub") is StubIntentService
+    assert load_backend("llm") is LLMIntentService
+    register_backend("custom", "dsl_agent.intent_service:StubIntentService")
+    try:
+        assert load_backend("custom") is StubIntentService
+    finally:
+        BACKENDS.pop("custom")
+
+
+def test_cli_import_leaves_llm_backend_unloaded():
+    code = "import sys, dsl_agent.cli; print(sorted({'dsl_agent.llm', 'openai'} & set(sys.modules)))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=ROOT)
+    assert out.stdout.strip() == "[]"
+
+
+def test_llm_client_created_on_first_use():
+    svc = LLMIntentService(api_base="http://127.0.0.1:9/v1", api_key="k", model="m")
+    assert svc._client is None
+    assert svc.client is svc.client
+
+
+def test_llm_prompt_includes_recent_turns():
+    ctx = ConversationContext(max_turns=3)
+    ctx.append("我想查订单", "ask_order", "routing")
+    svc = LLMIntentService(api_base="http://example", api_key="k", model="m", client=_DummyClient("provide_order"))
+    prompt = svc._build_prompt("order", ["provide_order"], "就是上次那个", ctx.summary())
+
+    assert 'Recent turns (oldest first, state/intent: utterance): routing/ask_order: "我想查订单".' in prompt
+    assert asyncio.run(svc.identify("就是上次那个", "order", ["provide_order"], context=ctx)) == "provide_order"
+
+
+def test_shadow_answers_from_primary_and_records_agreement():
+    primary = StubIntentService(mapping={"routing": {"order": "ask_order", "fly": "ask_flight"}})
+    candidate = StubIntentService(mapping={"routing": {"order": "ask_order", "fly": "ask_order"}})
+    shadow = ShadowIntentService(primary, candidate, latency_samples=1)
+    intents = ["ask_order", "ask_flight"]
+
+    assert asyncio.run(shadow.identify("order", "routing", intents)) == "ask_order"
+    assert asyncio.run(shadow.identify("fly", "routing", intents)) == "ask_flight"
+    shadow.flush()
+    stats = shadow.stats()
+    shadow.close()
+
+    assert stats["completed"] == 2 and stats["agreements"] == 1 and stats["agreement_rate"] == 0.5
+    assert stats["disagreements"] == {"ask_flight->ask_order": 1}
+    assert stats["candidate_ms"]["count"] == 2 and stats["primary_ms"]["count"] == 2
+    assert len(shadow.candidate_latencies) == len(shadow.primary_latencies) == 1  # bounded sample
+
+
+def test_shadow_never_waits_for_a_slow_candidate():
+    release = threading.Event()
+
+    class _Blocked:
+        async def identify(self, text, state, intents):
+            await asyncio.to_thread(release.wait, 5)
+            return "ask_order"
+
+    shadow = ShadowIntentService(StubIntentService(mapping={"s": {"x": "ask_order"}}), _Blocked(), max_queue=2)
+
+    async def run():
+        started = time.perf_counter()
+        for _ in range(20):
+            assert await shadow.identify("x", "s", ["ask_order"]) == "ask_order"
+        return time.perf_counter() - started
+
+    assert asyncio.run(run()) < 1.0
+    release.set()
+    shadow.close(timeout=5)
+    stats = shadow.stats()
+    assert stats["requests"] == 20
+    assert stats["sampled"] + stats["dropped"] == 20 and stats["dropped"] >= 17
@@ -3,6 +3,7 @@ import pathlib
 import pytest
 
 from dsl_agent import parser
+from dsl_agent.context import ConversationContext
 from dsl_agent.intent_service import StubIntentService
 from dsl_agent.interpreter import Interpreter
 
@@ -61,3 +62,33 @@ def test_reset():
     bot.reset()
     assert bot.current_state == scenario.initial_state
     assert bot.ended is False
+
+
+def test_context_window_is_bounded_and_passed_to_context_aware_services():
+    seen = []
+
+    class _ContextStub(StubIntentService):
+        accepts_context = True
+
+        async def identify(self, text, state, intents, context=None):
+            seen.append(context.summary() if context else None)
+            return await super().identify(text, state, intents)
+
+    scenario = load_scenario("travel_bot.dsl")
+    bot = Interpreter(scenario, _ContextStub(mapping={"start": {"hi": "greeting"}}), context_turns=2)
+
+    bot.process_input("hi")
+    bot.process_input("嗯")
+    bot.process_input("还是不知道")
+
+    assert seen[0] is None
+    assert seen[1] == 'start/greeting: "hi"'
+    assert seen[2] == 'start/greeting: "hi" | routing/default: "嗯"'
+    assert len(bot.context) == 2
+    bot.reset()
+    assert len(bot.context) == 0
+
+    ctx = ConversationContext(max_turns=10, max_utterance_chars=5, max_total_chars=12)
+    for i in range(10):
+        ctx.append(f"utterance {i}", "default", "start")
+    assert [turn[0] for turn in ctx.turns] == ["utter", "utter"]
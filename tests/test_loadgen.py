@@ -0,0 +1,83 @@
+import asyncio
+import pathlib
+import random
+import re
+import sys
+
+from dsl_agent import loadgen, parser
+from dsl_agent.intent_service import StubIntentService
+from dsl_agent.stats import Reservoir, percentile, summarize
+
+DATA_DIR = pathlib.Path(__file__).parent / "data"
+
+
+def test_percentiles_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) == 0.0
+    assert summarize([3.0, 1.0, 2.0])["p50"] == 2.0
+
+
+def test_reservoir_stays_bounded_and_keeps_exact_totals():
+    reservoir = Reservoir(size=100, rng=random.Random(1))
+    for value in range(1, 10001):
+        reservoir.add(float(value))
+    summary = reservoir.summary()
+    assert len(reservoir) == 100
+    assert summary["count"] == 10000 and summary["max"] == 10000.0 and summary["mean"] == 5000.5
+    assert 3500 < summary["p50"] < 6500  # a uniform sample of 1..10000
+
+
+def test_walker_defaults_and_stub_mapping():
+    scenario = parser.parse_script(DATA_DIR / "travel_bot.dsl")
+    walker = loadgen.RandomWalker(scenario, random.Random(0), default_weight=0.0)
+    picks = {walker.choose(scenario.states["routing"]) for _ in range(50)}
+    assert picks == {"ask_order", "ask_flight"}
+    assert walker.stub_mapping()["order"] == {"provide_order": "provide_order"}
+
+
+def test_load_generator_drives_interpreter_sessions():
+    scenario = parser.parse_script(DATA_DIR / "refund_bot.dsl")
+    walker = loadgen.RandomWalker(scenario, random.Random(1))
+    target = loadgen.InterpreterTarget(scenario, StubIntentService(mapping=walker.stub_mapping()))
+    generator = loadgen.LoadGenerator(scenario, target, walker, sessions=5, duration=0.3, sample_interval=0.1)
+
+    report = asyncio.run(generator.run())
+
+    assert report["turns"] > 0 and report["conversations"] > 0
+    assert report["errors"] == 0
+    assert report["latency_ms"]["p50"] <= report["latency_ms"]["p99"]
+    assert len(report["memory_rss_bytes"]) >= 2
+    assert len(target.sessions) <= 5  # finished conversations are released
+
+
+def test_load_generator_drives_batch_worker(tmp_path, monkeypatch):
+    monkeypatch.delenv("PYTHONUNBUFFERED", raising=False)  # the worker must not rely on it
+    scenario = parser.parse_script(DATA_DIR / "faq_bot.dsl")
+    walker = loadgen.RandomWalker(scenario, random.Random(2))
+    command = [
+        sys.executable,
+        str(pathlib.Path(__file__).parent.parent / "main.py"),
+        str(DATA_DIR / "faq_bot.dsl"),
+        "--use-stub",
+        "--batch",
+        "--log-file",
+        str(tmp_path / "worker.log"),
+    ]
+
+    async def main():
+        target = loadgen.BatchProcessTarget(command)
+        await target.start()
+        try:
+            # max_turns=1 cuts most conversations short; the target must close them in the worker
+            return await loadgen.LoadGenerator(scenario, target, walker, sessions=3, duration=0.5, max_turns=1).run()
+        finally:
+            assert not target._open
+            await target.stop()
+
+    report = asyncio.run(main())
+    assert report["turns"] > 0
+    assert report["errors"] == 0
+    closed = re.search(r"Batch finished: .*'closed': (\d+)", (tmp_path / "worker.log").read_text(encoding="utf-8"))
+    assert closed and int(closed.group(1)) > 0
@@ -1,3 +1,4 @@
+import dataclasses
 import pathlib
 
 import pytest
@@ -127,3 +128,96 @@ def test_missing_semicolon_fails(tmp_path: pathlib.Path):
     )
     with pytest.raises(parser.ParseError):
         parser.parse_script(bad_script)
+
+
+def test_identical_rules_share_one_immutable_transition():
+    pool = parser.TransitionPool()
+    travel = parser.parse_script(load_data("travel_bot.dsl"), pool)
+    start, routing = travel.states["start"], travel.states["routing"]
+    assert start.intents["ask_order"] is routing.intents["ask_order"]
+    assert start.default is routing.default
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        start.default.next_state = "order"  # type: ignore[misc]
+
+    again = parser.parse_script(load_data("travel_bot.dsl"), pool)  # a shared pool spans scenarios
+    assert again.states["order"].default is travel.states["order"].default
+    assert next(iter(again.states)) is next(iter(travel.states))  # interned names
+
+
+def test_state_timeout_override(tmp_path: pathlib.Path):
+    script = tmp_path / "timeout.dsl"
+    script.write_text(
+        'scenario x { state start { timeout 2.5; intent timeout -> "t" -> goto other; default -> "a" -> goto other; }'
+        ' state other { default -> "b" -> end; timeout 0; } }',
+        encoding="utf-8",
+    )
+    scenario = parser.parse_script(script)
+    assert scenario.states["start"].timeout == 2.5
+    assert "timeout" in scenario.states["start"].intents  # contextual, not reserved
+    assert scenario.states["other"].timeout == 0.0
+    assert parser.IncrementalParser().parse(script.read_text(encoding="utf-8")).states["start"].timeout == 2.5
+
+
+def test_duplicate_state_timeout_fails(tmp_path: pathlib.Path):
+    bad_script = tmp_path / "bad8.dsl"
+    bad_script.write_text(
+        'scenario x { state start { timeout 1; timeout 2; default -> "a" -> end; } }',
+        encoding="utf-8",
+    )
+    with pytest.raises(parser.ParseError):
+        parser.parse_script(bad_script)
+
+
+def test_incremental_parse_reparses_only_changed_blocks():
+    text = load_data("travel_bot.dsl").read_text(encoding="utf-8")
+    inc = parser.IncrementalParser()
+    scenario = inc.parse(text)
+    assert inc.last_reparsed == 5
+    routing = scenario.states["routing"]
+
+    edited = text.replace("请提供订单号（例如：2024-001）。", "请再提供一次订单号。")
+    patched = inc.parse(edited)
+    assert patched is scenario
+    assert inc.last_reparsed == 1
+    assert scenario.states["routing"] is routing
+    assert scenario.states["order"].default.response == "请再提供一次订单号。"
+    full = parser.Parser(parser.Lexer(edited).tokenize()).parse()
+    assert scenario == full
+
+
+def test_incremental_parse_prunes_its_pool_across_edits():
+    text = load_data("travel_bot.dsl").read_text(encoding="utf-8")
+    inc = parser.IncrementalParser()
+    inc.parse(text)
+    size = len(inc.pool)
+
+    for n in range(20):
+        inc.parse(text.replace("请提供订单号（例如：2024-001）。", f"请提供订单号 #{n}。"))
+    with pytest.raises(parser.ParseError):
+        inc.parse(text.replace("请提供订单号（例如：2024-001）。", '"'))
+    inc.parse(text)
+    assert len(inc.pool) == size
+    assert len(inc.pool.responses) <= size
+
+
+def test_incremental_parse_rejects_dangling_goto_and_keeps_scenario(tmp_path: pathlib.Path):
+    text = (
+        'scenario x {\n'
+        '  state start { intent go -> "a" -> goto second; default -> "b" -> end; }\n'
+        '  state second { default -> "c" -> end; }\n'
+        '}\n'
+    )
+    inc = parser.IncrementalParser()
+    scenario = inc.parse(text)
+
+    with pytest.raises(parser.ParseError, match="Goto target 'second'"):
+        inc.parse(text.replace('  state second { default -> "c" -> end; }\n', ""))
+    assert list(scenario.states) == ["start", "second"]
+
+    with pytest.raises(parser.ParseError) as excinfo:
+        inc.parse(text.replace('"c" -> end;', '"c" -> end'))
+    assert excinfo.value.line == 3
+
+    renamed = inc.parse(text.replace("second", "third"))
+    assert list(renamed.states) == ["start", "third"]
+    assert inc.last_reparsed == 2
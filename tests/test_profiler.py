@@ -0,0 +1,59 @@
+import json
+import pathlib
+
+from dsl_agent import parser
+from dsl_agent.intent_service import LLMIntentService, StubIntentService
+from dsl_agent.interpreter import Interpreter
+from dsl_agent.profiler import FlowProfiler
+
+
+def load_scenario(name: str):
+    return parser.parse_script(pathlib.Path(__file__).parent / "data" / name)
+
+
+class _UsageClient:
+    """Fake OpenAI client whose completions report token usage."""
+
+    def __init__(self, content: str, total_tokens: int):
+        usage = type("Usage", (), {"total_tokens": total_tokens})()
+        message = type("Msg", (), {"content": content})()
+        response = type("Resp", (), {"choices": [type("Choice", (), {"message": message})()], "usage": usage})()
+        completions = type("Completions", (), {"create": lambda self, **_: response})()
+        self.chat = type("Chat", (), {"completions": completions})()
+
+
+def test_profiler_aggregates_states_transitions_and_completions(tmp_path):
+    scenario = load_scenario("travel_bot.dsl")
+    profiler = FlowProfiler(scenario)
+    stub = StubIntentService(mapping={"start": {"hi": "greeting"}, "routing": {"order": "ask_order"}, "order": {"1": "provide_order"}})
+    for _ in range(2):
+        bot = Interpreter(scenario, stub)
+        profiler.attach(bot)
+        for text in ["hi", "???", "order", "1"]:
+            bot.process_input(text)
+
+    data = profiler.to_dict()
+    assert data["states"]["routing"]["visits"] == 4
+    assert data["states"]["routing"]["fallback_ratio"] == 0.5
+    assert data["turns_to_completion"]["histogram"] == {"4": 2}
+    edges = {(t["state"], t["intent"], t["next"]): t["count"] for t in data["transitions"]}
+    assert edges[("routing", "default", "routing")] == 2
+    assert edges[("order", "provide_order", "end")] == 2
+
+    paths = profiler.write(str(tmp_path / "flow.json"))
+    assert json.loads(pathlib.Path(paths[0]).read_text(encoding="utf-8"))["scenario"] == "travel_bot"
+    dot = pathlib.Path(paths[1]).read_text(encoding="utf-8")
+    assert '"routing" -> "routing" [label="default (2)"' in dot
+
+
+def test_profiler_records_llm_tokens():
+    scenario = load_scenario("travel_bot.dsl")
+    profiler = FlowProfiler(scenario)
+    llm = LLMIntentService(api_base="http://example", api_key="k", model="m", client=_UsageClient("greeting", 42))
+    bot = Interpreter(scenario, llm)
+    profiler.attach(bot)
+
+    bot.process_input("你好")
+
+    assert profiler.to_dict()["states"]["start"]["tokens"] == 42
+    assert "travel_bot;start;greeting" in profiler.to_folded()
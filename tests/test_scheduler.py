@@ -0,0 +1,83 @@
+import asyncio
+import pathlib
+
+from dsl_agent import parser
+from dsl_agent.interpreter import Interpreter
+from dsl_agent.scheduler import FairScheduler
+
+
+class _RecordingBackend:
+    """Takes ``delay`` seconds per call and records the order calls started in."""
+
+    def __init__(self, delay: float = 0.005) -> None:
+        self.delay = delay
+        self.started = []
+        self.active = 0
+        self.peak = 0
+
+    async def identify(self, text, state, intents):
+        self.started.append(text)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        return intents[0] if intents else None
+
+
+def test_flooding_tenant_does_not_starve_others():
+    backend = _RecordingBackend()
+    scheduler = FairScheduler(backend, max_concurrency=2)
+    noisy = scheduler.for_tenant("refund_bot", max_concurrency=2)
+    quiet = scheduler.for_tenant("travel_bot")
+
+    async def main():
+        flood = [asyncio.create_task(noisy.identify("noisy", "s", ["a"])) for _ in range(100)]
+        await asyncio.sleep(0.02)
+        assert await asyncio.wait_for(quiet.identify("quiet", "s", ["a"]), 0.1) == "a"
+        await asyncio.gather(*flood)
+
+    asyncio.run(main())
+    assert backend.peak <= 2
+    assert backend.started.index("quiet") < 15  # served in the next round, not after the backlog
+    stats = scheduler.stats()
+    assert stats["refund_bot"]["completed"] == 100 and stats["travel_bot"]["completed"] == 1
+    assert stats["travel_bot"]["queue_ms"]["max"] < stats["refund_bot"]["queue_ms"]["max"]
+
+
+def test_backlogged_tenants_share_by_weight_within_caps():
+    backend = _RecordingBackend(delay=0.001)
+    scheduler = FairScheduler(backend, max_concurrency=1)
+    heavy = scheduler.for_tenant("heavy", weight=3)
+    light = scheduler.for_tenant("light", weight=1)
+    capped = scheduler.for_tenant("capped", max_concurrency=1, max_queue=2)
+
+    async def main():
+        tasks = [
+            asyncio.create_task(svc.identify(name, "s", ["a"]))
+            for _ in range(40)
+            for name, svc in (("heavy", heavy), ("light", light))
+        ]
+        shed = await asyncio.gather(*(capped.identify("capped", "s", ["a"]) for _ in range(3)))
+        await asyncio.gather(*tasks)
+        return shed
+
+    shed = asyncio.run(main())
+    first = backend.started[:40]
+    assert 2.5 <= first.count("heavy") / first.count("light") <= 3.5
+    assert shed.count(None) == 1 and scheduler.stats()["capped"]["rejected"] == 1
+
+
+def test_interpreters_share_one_scheduler():
+    data = pathlib.Path(__file__).parent / "data"
+    scheduler = FairScheduler(_RecordingBackend(delay=0), max_concurrency=1)
+    travel = Interpreter(parser.parse_script(data / "travel_bot.dsl"), scheduler.for_tenant("travel_bot"))
+    refund = Interpreter(parser.parse_script(data / "refund_bot.dsl"), scheduler.for_tenant("refund_bot"))
+
+    async def main():
+        return await asyncio.gather(travel.process_input_async("hi"), refund.process_input_async("hi"))
+
+    replies = asyncio.run(main())
+    assert all(replies)
+    assert {name: s["completed"] for name, s in scheduler.stats().items()} == {"travel_bot": 1, "refund_bot": 1}
@@ -0,0 +1,83 @@
+import asyncio
+import pathlib
+
+from dsl_agent import parser
+from dsl_agent.intent_service import StubIntentService
+from dsl_agent.interpreter import Interpreter
+from dsl_agent.sessions import SessionManager
+from dsl_agent.timers import TimerWheel
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def load_scenario(name: str):
+    return parser.parse_script(pathlib.Path(__file__).parent / "data" / name)
+
+
+def test_wheel_fires_after_deadline_and_cancel_removes():
+    clock = FakeClock()
+    wheel = TimerWheel(tick=0.1, slots=8, clock=clock)
+    wheel.arm("a", 0.25)
+    wheel.arm("b", 0.25)
+    wheel.arm("c", 5.0)  # several revolutions away
+    assert wheel.cancel("b")
+    assert not wheel.cancel("missing")
+
+    assert wheel.advance(0.2) == []
+    assert wheel.advance(0.35) == ["a"]
+    assert wheel.advance(4.9) == []
+    assert wheel.advance(100.0) == ["c"]
+    assert len(wheel) == 0
+
+
+def test_wheel_rearm_replaces_previous_deadline():
+    clock = FakeClock()
+    wheel = TimerWheel(tick=0.1, slots=8, clock=clock)
+    wheel.arm("a", 0.2)
+    clock.now = 0.15
+    wheel.arm("a", 0.2)
+    assert wheel.advance(0.32) == []
+    assert wheel.advance(0.45) == ["a"]
+
+
+def test_session_timeout_runs_default_and_rearms():
+    clock = FakeClock()
+    fired = []
+    sessions = SessionManager(idle_timeout=1.0, on_timeout=lambda s, reply: fired.append((s, reply)),
+                              wheel=TimerWheel(tick=0.1, clock=clock))
+    stub = StubIntentService(mapping={"start": {"hi": "greeting"}})
+    scenario = load_scenario("travel_bot.dsl")
+    for n in range(1000):
+        sessions.add(n, Interpreter(scenario, stub))
+
+    clock.now = 0.5
+    assert sessions.expire() == []
+    asyncio.run(sessions.process(7, "hi"))  # session 7 is re-armed from now
+    clock.now = 1.05
+    assert len(sessions.expire()) == 999
+    assert sessions.get(0).current_state == "routing"
+    assert sessions.get(7).current_state == "routing"
+    assert 0 in sessions.wheel and 7 in sessions.wheel  # fired timers are re-armed for the new state
+    assert len(fired) == 999 and sessions.timeouts == 999
+
+
+def test_state_timeout_override_and_disable(tmp_path: pathlib.Path):
+    script = tmp_path / "t.dsl"
+    script.write_text(
+        'scenario x { state start { timeout 0.2; default -> "slow down" -> goto quiet; }'
+        ' state quiet { timeout 0; default -> "bye" -> end; } }',
+        encoding="utf-8",
+    )
+    clock = FakeClock()
+    sessions = SessionManager(idle_timeout=10.0, wheel=TimerWheel(tick=0.1, clock=clock))
+    bot = sessions.add("s", Interpreter(parser.parse_script(script), StubIntentService()))
+
+    assert sessions.expire(0.3) == [("s", "slow down")]
+    assert bot.current_state == "quiet"
+    assert "s" not in sessions.wheel  # timeout 0 disables it for this state